@@ -11,7 +11,10 @@ Note: The orchestrator automatically injects 'index_name' into tools that accept
 routing documents to the correct agent-specific search index.
 """
 
-from dataclasses import dataclass, field
+import inspect
+import sys
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from typing import Any, Callable, Awaitable
 
 # Import FAA tools
@@ -47,21 +50,30 @@ from app.tools.documents import (
 from app.config import get_settings
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class AgentConfig:
     """Configuration for an agent instance."""
     name: str
     search_index: str
     system_prompt: str
-    tool_definitions: list[dict[str, Any]]
+    tool_definitions: tuple[dict[str, Any], ...]
     tool_implementations: dict[str, Callable[..., Awaitable[str]]]
+    # Parameter names per tool, so the orchestrator can check for injectable
+    # params without calling inspect.signature on every tool call
+    tool_param_sets: dict[str, frozenset[str]] = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        object.__setattr__(self, "tool_param_sets", {
+            name: frozenset(inspect.signature(func).parameters)
+            for name, func in self.tool_implementations.items()
+        })
 
 
 # ============================================================================
 # FAA Agent Configuration
 # ============================================================================
 
-FAA_SYSTEM_PROMPT = """You are an expert FAA certification assistant. You help aviation professionals navigate FAA regulations and guidance documents.
+FAA_SYSTEM_PROMPT = sys.intern("""You are an expert FAA certification assistant. You help aviation professionals navigate FAA regulations and guidance documents.
 
 ## How to Answer Questions
 
@@ -189,25 +201,74 @@ When search results include personal documents (marked [Personal Document]), use
 
 6. **No external sources** - Do not cite press reports, Wikipedia, or training 
    data. Only cite: (a) the uploaded document, (b) official FAA documents 
-   from the index/DRS."""
+   from the index/DRS.""")
+
+
+# Search index names bound once at import (settings are fixed per process).
+# Tests that change env vars call reset_agent_registry() to rebind them.
+_SETTINGS = get_settings()
+_FAA_INDEX = _SETTINGS.azure_search_index
+_NRC_INDEX = _SETTINGS.azure_search_index_nrc
+_DOD_INDEX = _SETTINGS.azure_search_index_dod
+
+
+def _build_faa_search_tool(index_name: str) -> dict[str, Any]:
+    """Search tool definition with the FAA index name in its description."""
+    return {
+        **SEARCH_INDEXED_TOOL,
+        "description": SEARCH_INDEXED_TOOL["description"].replace(
+            "indexed content",
+            f"FAA regulations index ({index_name})"
+        ),
+    }
+
+
+FAA_SEARCH_INDEXED_TOOL: dict[str, Any] = _build_faa_search_tool(_FAA_INDEX)
+
+
+def _make_search_tool(
+    description: str,
+    query_example: str,
+    doc_types: list[str],
+    max_top_k: int = 10,
+) -> dict[str, Any]:
+    """
+    Build a search_indexed_content definition for an agent.
+    
+    Agents share the base tool's schema and differ only in description,
+    query example, top_k ceiling and doc_type filter values.
+    """
+    base_properties = SEARCH_INDEXED_TOOL["input_schema"]["properties"]
+    return {
+        "name": SEARCH_INDEXED_TOOL["name"],
+        "description": description,
+        "input_schema": {
+            **SEARCH_INDEXED_TOOL["input_schema"],
+            "properties": {
+                "query": {
+                    **base_properties["query"],
+                    "description": f"Natural language search query (e.g., {query_example})",
+                },
+                "top_k": {
+                    **base_properties["top_k"],
+                    "description": f"Number of results to return (default: 5, max: {max_top_k})",
+                },
+                "doc_type": {**base_properties["doc_type"], "enum": doc_types},
+            },
+        },
+    }
 
 
 def get_faa_search_index_tool() -> dict[str, Any]:
     """Get search tool definition with FAA-specific index name."""
-    settings = get_settings()
-    tool = SEARCH_INDEXED_TOOL.copy()
-    tool["description"] = tool["description"].replace(
-        "indexed content",
-        f"FAA regulations index ({settings.azure_search_index})"
-    )
-    return tool
+    return FAA_SEARCH_INDEXED_TOOL
 
 
 FAA_AGENT_CONFIG = AgentConfig(
     name="faa",
     search_index="faa-agent",  # Will be overridden by settings
     system_prompt=FAA_SYSTEM_PROMPT,
-    tool_definitions=[
+    tool_definitions=(
         SEARCH_INDEXED_TOOL,
         FETCH_CFR_TOOL,
         SEARCH_DRS_DEFINITION,
@@ -216,7 +277,7 @@ FAA_AGENT_CONFIG = AgentConfig(
         DELETE_MY_DOCUMENT_DEFINITION,
         FETCH_PERSONAL_DOCUMENT_DEFINITION,
         SEARCH_PERSONAL_DOCUMENT_DEFINITION,
-    ],
+    ),
     tool_implementations={
         "search_indexed_content": search_indexed_content,
         "fetch_cfr_section": fetch_cfr_section,
@@ -234,7 +295,7 @@ FAA_AGENT_CONFIG = AgentConfig(
 # NRC Agent Configuration
 # ============================================================================
 
-NRC_SYSTEM_PROMPT = """You are an expert NRC (Nuclear Regulatory Commission) regulatory assistant. You help nuclear industry professionals navigate NRC regulations and guidance documents.
+NRC_SYSTEM_PROMPT = sys.intern("""You are an expert NRC (Nuclear Regulatory Commission) regulatory assistant. You help nuclear industry professionals navigate NRC regulations and guidance documents.
 
 ## CRITICAL RULE - ALWAYS FOLLOW THIS ORDER:
 
@@ -360,13 +421,12 @@ When users upload their own documents and ask questions about them:
 3. **Distinguish sources clearly** - Use "According to your uploaded document..." vs "Per 10 CFR..."
 4. **If information is missing, say so** - Never fill gaps with general knowledge or assumptions
 5. **Handle truncated documents** - If fetch_personal_document indicates truncation, use search_personal_document to find specific content in the remainder
-6. **No external sources** - Only cite the uploaded document OR official NRC documents from the index/ADAMS"""
+6. **No external sources** - Only cite the uploaded document OR official NRC documents from the index/ADAMS""")
 
 
 # NRC search tool definition (same schema, different description)
-NRC_SEARCH_INDEXED_TOOL = {
-    "name": "search_indexed_content",
-    "description": """**MANDATORY FIRST STEP** - Search the cached NRC document index.
+NRC_SEARCH_INDEXED_TOOL = _make_search_tool(
+    description="""**MANDATORY FIRST STEP** - Search the cached NRC document index.
 
 YOU MUST CALL THIS TOOL FIRST before using search_aps. This is required for every question.
 
@@ -376,33 +436,15 @@ Returns relevant document snippets with accession numbers. Use fetch_aps_documen
 
 Only use search_aps if THIS tool returns no relevant results.
 """,
-    "input_schema": {
-        "type": "object",
-        "properties": {
-            "query": {
-                "type": "string",
-                "description": "Natural language search query (e.g., 'Part 21 reporting requirements' or 'safety valve defects')",
-            },
-            "top_k": {
-                "type": "integer",
-                "description": "Number of results to return (default: 5, max: 10)",
-                "default": 5,
-            },
-            "doc_type": {
-                "type": "string",
-                "description": "Optional: filter by document type",
-                "enum": ["cfr", "nureg", "rg", "gl", "bulletin"],
-            },
-        },
-        "required": ["query"],
-    },
-}
+    query_example="'Part 21 reporting requirements' or 'safety valve defects'",
+    doc_types=["cfr", "nureg", "rg", "gl", "bulletin"],
+)
 
 NRC_AGENT_CONFIG = AgentConfig(
     name="nrc",
     search_index="nrc-agent",  # Will be overridden by settings
     system_prompt=NRC_SYSTEM_PROMPT,
-    tool_definitions=[
+    tool_definitions=(
         NRC_SEARCH_INDEXED_TOOL,  # NRC-specific description
         FETCH_CFR_TOOL,  # For fetching 10 CFR references
         SEARCH_APS_DEFINITION,
@@ -411,7 +453,7 @@ NRC_AGENT_CONFIG = AgentConfig(
         DELETE_MY_DOCUMENT_DEFINITION,
         FETCH_PERSONAL_DOCUMENT_DEFINITION,
         SEARCH_PERSONAL_DOCUMENT_DEFINITION,
-    ],
+    ),
     tool_implementations={
         "search_indexed_content": search_indexed_content,  # Orchestrator injects index_name
         "fetch_cfr_section": fetch_cfr_section,  # For 10 CFR references
@@ -429,7 +471,7 @@ NRC_AGENT_CONFIG = AgentConfig(
 # DoD Contract Agent Configuration
 # ============================================================================
 
-DOD_SYSTEM_PROMPT = """You are an expert DoD (Department of Defense) contract compliance assistant. You help defense contractors and government acquisition professionals navigate FAR, DFARS, and DoD security requirements.
+DOD_SYSTEM_PROMPT = sys.intern("""You are an expert DoD (Department of Defense) contract compliance assistant. You help defense contractors and government acquisition professionals navigate FAR, DFARS, and DoD security requirements.
 
 ## CRITICAL RULE - ALWAYS FOLLOW THIS ORDER:
 
@@ -550,13 +592,12 @@ When users upload their own documents and ask questions about them:
 3. **Distinguish sources clearly** - Use "According to your uploaded document..." vs "Per FAR/DFARS..."
 4. **If information is missing, say so** - Never fill gaps with general knowledge or assumptions
 5. **Handle truncated documents** - If fetch_personal_document indicates truncation, use search_personal_document to find specific content in the remainder
-6. **No external sources** - Only cite the uploaded document OR official DoD regulations from the CFR"""
+6. **No external sources** - Only cite the uploaded document OR official DoD regulations from the CFR""")
 
 
 # DoD search tool definition (same schema, DoD-specific description)
-DOD_SEARCH_INDEXED_TOOL = {
-    "name": "search_indexed_content",
-    "description": """**MANDATORY FIRST STEP** - Search the cached DoD regulations index.
+DOD_SEARCH_INDEXED_TOOL = _make_search_tool(
+    description="""**MANDATORY FIRST STEP** - Search the cached DoD regulations index.
 
 YOU MUST CALL THIS TOOL FIRST for every question. This is required.
 
@@ -566,40 +607,22 @@ This tool searches pre-indexed DoD-relevant documents:
 
 Returns relevant document snippets with CFR citations. Use fetch_cfr_section to get full text.
 """,
-    "input_schema": {
-        "type": "object",
-        "properties": {
-            "query": {
-                "type": "string",
-                "description": "Natural language search query (e.g., 'DFARS cybersecurity requirements' or 'cost accounting standards')",
-            },
-            "top_k": {
-                "type": "integer",
-                "description": "Number of results to return (default: 5, max: 10)",
-                "default": 5,
-            },
-            "doc_type": {
-                "type": "string",
-                "description": "Optional: filter by document type",
-                "enum": ["cfr", "far", "dfars"],
-            },
-        },
-        "required": ["query"],
-    },
-}
+    query_example="'DFARS cybersecurity requirements' or 'cost accounting standards'",
+    doc_types=["cfr", "far", "dfars"],
+)
 
 DOD_AGENT_CONFIG = AgentConfig(
     name="dod",
     search_index="dod-agent",  # Will be overridden by settings
     system_prompt=DOD_SYSTEM_PROMPT,
-    tool_definitions=[
+    tool_definitions=(
         DOD_SEARCH_INDEXED_TOOL,  # DoD-specific description
         FETCH_CFR_TOOL,  # For fetching Title 32 and Title 48 CFR
         LIST_MY_DOCUMENTS_DEFINITION,
         DELETE_MY_DOCUMENT_DEFINITION,
         FETCH_PERSONAL_DOCUMENT_DEFINITION,
         SEARCH_PERSONAL_DOCUMENT_DEFINITION,
-    ],
+    ),
     tool_implementations={
         "search_indexed_content": search_indexed_content,  # Orchestrator injects index_name
         "fetch_cfr_section": fetch_cfr_section,  # For Title 32 and Title 48 CFR
@@ -621,6 +644,13 @@ AGENT_CONFIGS: dict[str, AgentConfig] = {
     "dod": DOD_AGENT_CONFIG,
 }
 
+# Each agent's resolved search index name (rebound by reset_agent_registry)
+_AGENT_INDEXES: dict[str, str] = {
+    "faa": _FAA_INDEX,
+    "nrc": _NRC_INDEX,
+    "dod": _DOD_INDEX,
+}
+
 
 def get_agent_config(agent_name: str) -> AgentConfig:
     """
@@ -635,18 +665,35 @@ def get_agent_config(agent_name: str) -> AgentConfig:
     Raises:
         ValueError: If agent name is not recognized
     """
-    config = AGENT_CONFIGS.get(agent_name.lower())
-    if config is None:
+    name_lower = agent_name.lower()
+    # Reject unknown names before the cached lookup so misses are never cached
+    if name_lower not in AGENT_CONFIGS:
         valid_agents = ", ".join(AGENT_CONFIGS.keys())
         raise ValueError(f"Unknown agent '{agent_name}'. Valid agents: {valid_agents}")
     
-    # Update search index from settings
-    settings = get_settings()
-    if agent_name.lower() == "faa":
-        config.search_index = settings.azure_search_index
-    elif agent_name.lower() == "nrc":
-        config.search_index = settings.azure_search_index_nrc
-    elif agent_name.lower() == "dod":
-        config.search_index = settings.azure_search_index_dod
+    return _get_agent_config_cached(name_lower)
+
+
+@lru_cache(maxsize=8)
+def _get_agent_config_cached(name_lower: str) -> AgentConfig:
+    """Resolve an agent config once per process."""
+    # New instance with the bound index name - registry entries stay untouched
+    return replace(AGENT_CONFIGS[name_lower], search_index=_AGENT_INDEXES[name_lower])
+
+
+def reset_agent_registry() -> None:
+    """
+    Re-read settings and rebind the cached index names.
+    
+    Only needed when settings change at runtime (e.g. tests that patch env vars).
+    """
+    global _SETTINGS, _FAA_INDEX, _NRC_INDEX, _DOD_INDEX, FAA_SEARCH_INDEXED_TOOL
+    get_settings.cache_clear()
+    _get_agent_config_cached.cache_clear()
     
-    return config
+    _SETTINGS = get_settings()
+    _FAA_INDEX = _SETTINGS.azure_search_index
+    _NRC_INDEX = _SETTINGS.azure_search_index_nrc
+    _DOD_INDEX = _SETTINGS.azure_search_index_dod
+    _AGENT_INDEXES.update(faa=_FAA_INDEX, nrc=_NRC_INDEX, dod=_DOD_INDEX)
+    FAA_SEARCH_INDEXED_TOOL = _build_faa_search_tool(_FAA_INDEX)
@@ -53,6 +53,7 @@ class Settings(BaseSettings):
     # Feature flags
     cache_enabled: bool = True
     auto_index_on_cache_hit: bool = True
+    semantic_cache_enabled: bool = False  # Answer near-duplicate questions from cache
     
     # App Settings
     debug: bool = False
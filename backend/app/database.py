@@ -1,54 +1,223 @@
 """
 SQLite database layer for trial access code management.
 Tracks code usage counts and dynamically generated codes.
+
+All SQLite work runs on one pinned executor thread that owns a plain
+sqlite3 connection, so async callers never block the event loop and
+related statements can share a single executor hop.
 """
 
-import aiosqlite
+import asyncio
 import logging
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, TypeVar
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Database file location (in backend directory)
 DB_PATH = Path(__file__).parent.parent / "trial_codes.db"
 
+# Rows fetched per executor hop when streaming query results
+FETCH_BATCH_SIZE = 100
+
+# Single worker: the connection is only ever touched from this thread
+_db_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+# Module-level singleton connection (opened lazily, closed on shutdown)
+_db: sqlite3.Connection | None = None
+
+# LRU of is_generated_code results (codes are never deleted, so only
+# inserts need to invalidate an entry)
+GENERATED_CODE_CACHE_SIZE = 1024
+_generated_code_cache: OrderedDict[str, bool] = OrderedDict()
+
+# Write-behind usage counters: bumped in memory, flushed to SQLite periodically.
+# Flushes add each code's unflushed increments to the stored count, so several
+# worker processes sharing the database never overwrite each other's counts.
+USAGE_FLUSH_INTERVAL = 5.0  # seconds
+USAGE_FLUSH_BATCH_SIZE = 64  # dirty codes that trigger an early flush
+_counts: dict[str, int] = {}
+_pending: dict[str, int] = {}  # code -> increments not yet flushed
+_first_used: dict[str, int] = {}
+_last_used: dict[str, int] = {}
+_flush_task: asyncio.Task | None = None
+
+# Created on first use, inside the running event loop
+_counts_lock: asyncio.Lock | None = None
+_flush_wakeup: asyncio.Event | None = None
+
+
+def _usage_sync() -> tuple[asyncio.Lock, asyncio.Event]:
+    """Get the counters' lock and the flusher's wakeup event, creating them on first use."""
+    global _counts_lock, _flush_wakeup
+    if _counts_lock is None or _flush_wakeup is None:
+        _counts_lock = asyncio.Lock()
+        _flush_wakeup = asyncio.Event()
+    return _counts_lock, _flush_wakeup
+
+
+async def _run(fn: Callable[..., T], *args: Any) -> T:
+    """Run a blocking sqlite3 call on the database thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_db_pool, fn, *args)
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the shared connection (runs on the database thread)."""
+    # isolation_level=None: autocommit by default, explicit BEGIN for batches.
+    # sqlite3 keeps compiled statements in its per-connection statement cache,
+    # so the same SQL text is not re-parsed on every call.
+    db = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level=None)
+    # WAL lets readers proceed while a write is in flight, and
+    # synchronous=NORMAL is still durable in WAL mode without an fsync per commit
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    # Read-heavy lookups (get_usage, is_generated_code): memory-map up to 256 MB
+    # so page reads skip pread syscalls, keep ~20 MB of pages cached, and
+    # keep temp tables/indices in memory
+    db.execute("PRAGMA mmap_size=268435456")
+    db.execute("PRAGMA cache_size=-20000")
+    db.execute("PRAGMA temp_store=MEMORY")
+    db.row_factory = sqlite3.Row
+    return db
+
+
+async def get_db() -> sqlite3.Connection:
+    """
+    Get the shared database connection, opening it on first use.
+
+    The connection must only be used through _run (i.e. on the database thread).
+    """
+    global _db
+    if _db is None:
+        _db = await _run(_connect)
+    return _db
+
+
+async def close_db() -> None:
+    """Flush pending usage and close the shared database connection (called on app shutdown)."""
+    global _db, _flush_task, _counts_lock, _flush_wakeup
+    if _flush_task is not None:
+        _flush_task.cancel()
+        try:
+            await _flush_task
+        except asyncio.CancelledError:
+            pass
+        _flush_task = None
+    if _db is not None:
+        await flush_usage()
+        await _run(_db.close)
+        _db = None
+    _counts_lock = _flush_wakeup = None
+
+
+# Timestamps are INTEGER epoch seconds (UTC); they are formatted to ISO
+# only when listed. WITHOUT ROWID clusters rows on the code b-tree.
+CODE_USAGE_SCHEMA = """(
+    code TEXT PRIMARY KEY,
+    request_count INTEGER DEFAULT 0,
+    first_used_at INTEGER,
+    last_used_at INTEGER
+) WITHOUT ROWID"""
+
+
+def _migrate_code_usage(db: sqlite3.Connection) -> None:
+    """
+    Rebuild a legacy code_usage table (one-shot).
+    
+    Older tables were rowid tables and/or stored ISO text timestamps; both are
+    converted to the current WITHOUT ROWID, epoch-seconds layout.
+    """
+    row = db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'code_usage'"
+    ).fetchone()
+    if row is None:
+        return
+    sql = row[0].upper()
+    if "WITHOUT ROWID" in sql and "LAST_USED_AT INTEGER" in sql:
+        return
+
+    logger.info("Migrating code_usage table to WITHOUT ROWID with epoch timestamps")
+    db.execute("BEGIN")
+    try:
+        db.execute(f"CREATE TABLE code_usage_new {CODE_USAGE_SCHEMA}")
+        db.execute("""
+            INSERT INTO code_usage_new (code, request_count, first_used_at, last_used_at)
+            SELECT
+                code,
+                request_count,
+                CAST(strftime('%s', first_used_at) AS INTEGER),
+                CAST(strftime('%s', last_used_at) AS INTEGER)
+            FROM code_usage
+        """)
+        db.execute("DROP TABLE code_usage")
+        db.execute("ALTER TABLE code_usage_new RENAME TO code_usage")
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+def _init_schema(db: sqlite3.Connection) -> list[sqlite3.Row]:
+    """Create tables and return persisted counts (runs on the database thread)."""
+    # Table for tracking usage of all codes (env + generated).
+    # WITHOUT ROWID: a lookup by code touches one index instead of the
+    # primary-key index plus the rowid table.
+    _migrate_code_usage(db)
+    db.execute(f"CREATE TABLE IF NOT EXISTS code_usage {CODE_USAGE_SCHEMA}")
+
+    # Table for dynamically generated codes (via admin API)
+    db.execute("""
+        CREATE TABLE IF NOT EXISTS generated_codes (
+            code TEXT PRIMARY KEY,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            created_by TEXT
+        )
+    """)
+
+    return db.execute("SELECT code, request_count FROM code_usage").fetchall()
+
 
 async def init_db() -> None:
     """Initialize database tables if they don't exist."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Table for tracking usage of all codes (env + generated)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS code_usage (
-                code TEXT PRIMARY KEY,
-                request_count INTEGER DEFAULT 0,
-                first_used_at TIMESTAMP,
-                last_used_at TIMESTAMP
-            )
-        """)
-        
-        # Table for dynamically generated codes (via admin API)
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS generated_codes (
-                code TEXT PRIMARY KEY,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_by TEXT
-            )
-        """)
-        
-        await db.commit()
-        logger.info(f"Database initialized at {DB_PATH}")
+    db = await get_db()
+    rows = await _run(_init_schema, db)
+
+    # Warm the in-memory counters so increments never need a read
+    _counts.update((row[0], row[1]) for row in rows)
+
+    _start_usage_flusher()
+    logger.info(f"Database initialized at {DB_PATH} ({len(_counts)} tracked codes)")
+
+
+def _select_count(db: sqlite3.Connection, code: str) -> int:
+    row = db.execute(
+        "SELECT request_count FROM code_usage WHERE code = ?",
+        (code,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+async def _load_count(code: str) -> int:
+    """Read a code's persisted count into the in-memory counters."""
+    db = await get_db()
+    count = await _run(_select_count, db, code)
+    return _counts.setdefault(code, count)
 
 
 async def get_usage(code: str) -> int:
     """Get the current request count for a code. Returns 0 if not tracked yet."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT request_count FROM code_usage WHERE code = ?",
-            (code,)
-        )
-        row = await cursor.fetchone()
-        return row[0] if row else 0
+    count = _counts.get(code)
+    if count is not None:
+        return count
+    return await _load_count(code)
 
 
 async def increment_usage(code: str) -> int:
@@ -56,67 +225,196 @@ async def increment_usage(code: str) -> int:
     Increment the request count for a code.
     Creates the record if it doesn't exist.
     Returns the new count.
+
+    The count is bumped in memory and persisted by the background flusher
+    (see flush_usage), so this never waits on disk I/O for warmed codes.
     """
-    now = datetime.utcnow().isoformat()
-    async with aiosqlite.connect(DB_PATH) as db:
-        # Upsert: insert or update
-        await db.execute("""
-            INSERT INTO code_usage (code, request_count, first_used_at, last_used_at)
-            VALUES (?, 1, ?, ?)
-            ON CONFLICT(code) DO UPDATE SET
-                request_count = request_count + 1,
-                last_used_at = ?
-        """, (code, now, now, now))
-        await db.commit()
-        
-        # Fetch the new count
-        cursor = await db.execute(
-            "SELECT request_count FROM code_usage WHERE code = ?",
-            (code,)
-        )
-        row = await cursor.fetchone()
-        new_count = row[0] if row else 1
-        logger.info(f"Code {code[:8]}... usage incremented to {new_count}")
-        return new_count
+    now = int(time.time())
+    counts_lock, flush_wakeup = _usage_sync()
+    async with counts_lock:
+        if code not in _counts:
+            await _load_count(code)
+        new_count = _counts[code] + 1
+        _counts[code] = new_count
+        _pending[code] = _pending.get(code, 0) + 1
+        _first_used.setdefault(code, now)
+        _last_used[code] = now
+        if len(_pending) >= USAGE_FLUSH_BATCH_SIZE:
+            flush_wakeup.set()
+
+    _start_usage_flusher()
+    logger.info(f"Code {code[:8]}... usage incremented to {new_count}")
+    return new_count
+
+
+def _write_usage_batch(db: sqlite3.Connection, batch: list[tuple]) -> dict[str, int]:
+    """
+    Add a batch of usage deltas in one transaction (runs on the database thread).
+
+    Returns each code's stored total after the write, which includes
+    increments flushed by other worker processes.
+    """
+    totals = {}
+    db.execute("BEGIN")
+    try:
+        for row in batch:
+            totals[row[0]] = db.execute("""
+                INSERT INTO code_usage (code, request_count, first_used_at, last_used_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(code) DO UPDATE SET
+                    request_count = request_count + excluded.request_count,
+                    last_used_at = MAX(COALESCE(last_used_at, 0), excluded.last_used_at)
+                RETURNING request_count
+            """, row).fetchone()[0]
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    return totals
+
+
+async def flush_usage() -> int:
+    """
+    Persist dirty usage counters to SQLite in a single batch.
+    Returns the number of codes written.
+    """
+    counts_lock, _ = _usage_sync()
+    async with counts_lock:
+        if not _pending:
+            return 0
+        batch = [
+            (code, delta, _first_used.get(code), _last_used.get(code))
+            for code, delta in _pending.items()
+        ]
+        _pending.clear()
+
+    db = await get_db()
+    try:
+        totals = await _run(_write_usage_batch, db, batch)
+    except Exception as e:
+        # Put the deltas back so the next flush retries them
+        logger.error(f"Usage flush failed for {len(batch)} codes: {e}")
+        async with counts_lock:
+            for code, delta, *_ in batch:
+                _pending[code] = _pending.get(code, 0) + delta
+        return 0
+
+    # Pick up other workers' increments, keeping any made since the snapshot;
+    # timestamps are only needed until a code's last increment is written
+    async with counts_lock:
+        for code, total in totals.items():
+            _counts[code] = total + _pending.get(code, 0)
+            if code not in _pending:
+                _first_used.pop(code, None)
+                _last_used.pop(code, None)
+
+    logger.debug(f"Flushed usage for {len(batch)} codes")
+    return len(batch)
+
+
+async def _flush_usage_loop() -> None:
+    """
+    Flush usage counters until cancelled.
+
+    Writes happen every USAGE_FLUSH_INTERVAL seconds, or sooner once
+    USAGE_FLUSH_BATCH_SIZE codes are dirty, so bursts of increments from
+    concurrent requests are coalesced into one transaction with a single
+    INSERT ... RETURNING per code.
+    """
+    _, flush_wakeup = _usage_sync()
+    while True:
+        try:
+            await asyncio.wait_for(flush_wakeup.wait(), USAGE_FLUSH_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+        flush_wakeup.clear()
+        try:
+            await flush_usage()
+        except Exception as e:
+            logger.error(f"Usage flusher error: {e}")
+
+
+def _start_usage_flusher() -> None:
+    """Start the background flush task if it isn't already running."""
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(_flush_usage_loop())
 
 
 async def add_generated_code(code: str, created_by: str = "admin") -> None:
     """Add a new dynamically generated code to the database."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute(
-            "INSERT INTO generated_codes (code, created_by) VALUES (?, ?)",
-            (code, created_by)
-        )
-        await db.commit()
-        logger.info(f"Generated new code: {code}")
+    db = await get_db()
+    await _run(
+        db.execute,
+        "INSERT INTO generated_codes (code, created_by) VALUES (?, ?)",
+        (code, created_by)
+    )
+    _generated_code_cache.pop(code, None)
+    logger.info(f"Generated new code: {code}")
+
+
+def _select_generated(db: sqlite3.Connection, code: str) -> bool:
+    return db.execute(
+        "SELECT 1 FROM generated_codes WHERE code = ?",
+        (code,)
+    ).fetchone() is not None
 
 
 async def is_generated_code(code: str) -> bool:
     """Check if a code was dynamically generated (vs from env vars)."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        cursor = await db.execute(
-            "SELECT 1 FROM generated_codes WHERE code = ?",
-            (code,)
-        )
-        row = await cursor.fetchone()
-        return row is not None
+    cached = _generated_code_cache.get(code)
+    if cached is not None:
+        _generated_code_cache.move_to_end(code)
+        return cached
+    
+    db = await get_db()
+    result = await _run(_select_generated, db, code)
+    _generated_code_cache[code] = result
+    if len(_generated_code_cache) > GENERATED_CODE_CACHE_SIZE:
+        _generated_code_cache.popitem(last=False)
+    return result
+
+
+async def iter_generated_codes() -> AsyncIterator[sqlite3.Row]:
+    """
+    Stream all dynamically generated codes with their usage stats.
+
+    Yields rows as they are read so callers can serialize them one at a time
+    instead of materializing the whole table. Rows are pulled from the
+    database thread FETCH_BATCH_SIZE at a time.
+    """
+    db = await get_db()
+    cursor = await _run(db.execute, """
+        SELECT
+            g.code,
+            g.created_at,
+            g.created_by,
+            COALESCE(u.request_count, 0) as request_count,
+            u.first_used_at,
+            u.last_used_at
+        FROM generated_codes g
+        LEFT JOIN code_usage u ON g.code = u.code
+        ORDER BY g.created_at DESC
+    """)
+    try:
+        while rows := await _run(cursor.fetchmany, FETCH_BATCH_SIZE):
+            for row in rows:
+                yield row
+    finally:
+        await _run(cursor.close)
+
+
+def _epoch_to_iso(ts: int | None) -> str | None:
+    """Format a stored epoch-seconds timestamp as a UTC ISO string."""
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat() if ts is not None else None
 
 
 async def list_generated_codes() -> list[dict]:
     """List all dynamically generated codes with their usage stats."""
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        cursor = await db.execute("""
-            SELECT 
-                g.code,
-                g.created_at,
-                g.created_by,
-                COALESCE(u.request_count, 0) as request_count,
-                u.first_used_at,
-                u.last_used_at
-            FROM generated_codes g
-            LEFT JOIN code_usage u ON g.code = u.code
-            ORDER BY g.created_at DESC
-        """)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    codes = []
+    async for row in iter_generated_codes():
+        item = dict(row)
+        item["first_used_at"] = _epoch_to_iso(item["first_used_at"])
+        item["last_used_at"] = _epoch_to_iso(item["last_used_at"])
+        codes.append(item)
+    return codes
@@ -0,0 +1,29 @@
+"""
+Process-wide pooled HTTP client.
+
+Outbound calls to the search proxy, embedding and search endpoints and the
+geolocation API share one connection pool, so keep-alive connections are
+reused across services. Timeouts are passed on each request.
+"""
+
+import httpx
+
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared pooled HTTP client."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client (no-op if never opened)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
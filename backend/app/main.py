@@ -1,21 +1,240 @@
 import asyncio
+import functools
 import logging
-from contextlib import asynccontextmanager
+import weakref
+from contextlib import aclosing, asynccontextmanager, suppress
+from datetime import datetime, timezone
+from typing import AsyncIterator, TypeVar
+
+import orjson
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Query
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.websockets import WebSocketState
 
 from app.config import get_settings
 from app.routers import health, auth, feedback, admin, documents
 from app.routers.auth import decode_jwt_token
+from app.routers.documents import shutdown_ocr_pool
 from app.services.orchestrator import handle_conversation
 from app.services.usage import get_usage_tracker
+from app.services.feedback import get_feedback_service
 from app.services.geolocation import extract_client_ip
 from app.agents import get_agent_config
+from app.database import close_db
+from app.http_client import close_http_client
+from app.middleware import PreflightMiddleware
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Keep-alive: one shared task pings every open chat socket, instead of one
+# sleeping task per connection.
+PING_INTERVAL = 20  # seconds
+
+# Fixed frames are encoded once at import. All frames go out as text
+# because the frontend JSON.parses event.data.
+PING_FRAME = orjson.dumps({"type": "ping"}).decode()
+DONE_FRAME = orjson.dumps({"type": "done"}).decode()
+EMPTY_MESSAGE_FRAME = orjson.dumps({"type": "error", "content": "Empty message"}).decode()
+# daily_request_limit is fixed per process, so the quota rejection is static too
+QUOTA_EXCEEDED_FRAME = orjson.dumps({
+    "type": "error",
+    "content": f"You've used your {get_settings().daily_request_limit} daily queries. Come back tomorrow!"
+}).decode()
+
+
+class SafeSender:
+    """
+    Serialized, disconnect-tolerant writer for one chat socket.
+    
+    Sends are lock-guarded so the shared pinger and the response stream never
+    interleave frames. The first failed write marks the sender closed, and
+    later sends become no-ops instead of checking client_state per chunk.
+    """
+    
+    __slots__ = ("ws", "open", "_lock", "__weakref__")
+    
+    def __init__(self, ws: WebSocket):
+        self.ws = ws
+        self.open = True
+        self._lock = asyncio.Lock()
+    
+    async def send_text(self, frame: str) -> bool:
+        """Send a pre-encoded frame. Returns False once the socket is closed."""
+        if not self.open:
+            return False
+        async with self._lock:
+            try:
+                await self.ws.send_text(frame)
+            except (WebSocketDisconnect, RuntimeError):
+                self.open = False
+        return self.open
+    
+    async def send(self, obj: dict) -> bool:
+        """Send a JSON message as a text frame, encoded with orjson."""
+        return await self.send_text(orjson.dumps(obj).decode())
+
+
+_active_senders: weakref.WeakSet[SafeSender] = weakref.WeakSet()
+_ping_task: asyncio.Task | None = None
+
+
+async def receive(ws: WebSocket) -> dict:
+    """
+    Receive one JSON message, decoded with orjson.
+    
+    Accepts text or binary frames. The frontend sends text, so this reads the
+    raw ASGI message instead of receive_bytes (which rejects text frames).
+    """
+    message = await ws.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    raw = message.get("bytes")
+    if raw is None:
+        raw = message.get("text", "")
+    return orjson.loads(raw)
+
+
+async def _ping_active_senders() -> None:
+    """Send a ping to every open chat socket every PING_INTERVAL seconds."""
+    while True:
+        await asyncio.sleep(PING_INTERVAL)
+        for sender in list(_active_senders):
+            if not await sender.send_text(PING_FRAME):
+                _active_senders.discard(sender)
+
+
+def ensure_ping_task() -> None:
+    """Start the shared ping task if it isn't already running."""
+    global _ping_task
+    if _ping_task is None or _ping_task.done():
+        _ping_task = asyncio.create_task(_ping_active_senders())
+
+
+# Streamed chunks are coalesced into {"type": "batch", "items": [...]} frames
+STREAM_BATCH_WAIT = 0.01  # seconds from the first buffered chunk to a flush
+STREAM_BATCH_MAX = 16  # chunks per frame
+STREAM_QUEUE_SIZE = 64  # chunks buffered between orchestrator and socket
+_STREAM_END = object()
+
+
+async def aiter_batched(
+    source: AsyncIterator[T],
+    max_wait: float = STREAM_BATCH_WAIT,
+    max_items: int = STREAM_BATCH_MAX,
+    flush_first: bool = False,
+) -> AsyncIterator[list[T]]:
+    """
+    Group items from an async iterator into lists.
+    
+    A list is yielded once it holds max_items, or max_wait seconds after its
+    first item arrived, whichever comes first. With flush_first, the very first
+    item is yielded on its own without waiting. The pending __anext__ is awaited
+    with asyncio.wait rather than wait_for so a flush never cancels the source.
+    """
+    loop = asyncio.get_running_loop()
+    batch: list[T] = []
+    deadline = 0.0
+    wait = 0.0 if flush_first else max_wait
+    pending: asyncio.Future | None = None
+    try:
+        while True:
+            if pending is None:
+                pending = asyncio.ensure_future(anext(source))
+            timeout = max(0.0, deadline - loop.time()) if batch else None
+            done, _ = await asyncio.wait({pending}, timeout=timeout)
+            if not done:
+                yield batch
+                batch = []
+                continue
+            
+            future, pending = pending, None
+            try:
+                item = future.result()
+            except StopAsyncIteration:
+                break
+            if not batch:
+                deadline = loop.time() + wait
+                wait = max_wait
+            batch.append(item)
+            if len(batch) >= max_items:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    finally:
+        if pending is not None:
+            pending.cancel()
+
+
+def merge_text_chunks(chunks: list[dict]) -> list[dict]:
+    """
+    Merge each run of consecutive text chunks into one text chunk.
+    
+    Other chunks (thinking, tool status, clear_text) keep their place, so the
+    frontend sees the same stream in fewer items.
+    """
+    merged: list[dict] = []
+    run: list[str] = []
+    for chunk in chunks:
+        if chunk.get("type") == "text":
+            run.append(chunk["content"])
+            continue
+        if run:
+            merged.append({"type": "text", "content": "".join(run)})
+            run = []
+        merged.append(chunk)
+    if run:
+        merged.append({"type": "text", "content": "".join(run)})
+    return merged
+
+
+async def _produce(source: AsyncIterator[dict], queue: asyncio.Queue) -> None:
+    """Copy chunks into the queue, ending with _STREAM_END or the error raised."""
+    try:
+        async for chunk in source:
+            await queue.put(chunk)
+    except Exception as e:
+        await queue.put(e)
+    else:
+        await queue.put(_STREAM_END)
+
+
+async def _drain(queue: asyncio.Queue) -> AsyncIterator[dict]:
+    """Yield chunks from the queue until the producer finishes (re-raising its error)."""
+    while (item := await queue.get()) is not _STREAM_END:
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+async def stream_to_socket(sender: SafeSender, source: AsyncIterator[dict]) -> bool:
+    """
+    Forward streamed chunks to the socket as (batched) frames.
+    
+    The orchestrator runs as a separate producer task feeding a bounded queue,
+    so a slow client doesn't stall token generation; when the queue is full
+    the producer waits. The first chunk goes out at once (time to first token
+    is unchanged); after that, adjacent text deltas within a batch window are
+    merged. Returns False if the client went away mid-stream.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    producer = asyncio.create_task(_produce(source, queue))
+    try:
+        async with aclosing(aiter_batched(_drain(queue), flush_first=True)) as batches:
+            async for chunks in batches:
+                chunks = merge_text_chunks(chunks)
+                frame = chunks[0] if len(chunks) == 1 else {"type": "batch", "items": chunks}
+                if not await sender.send(frame):
+                    return False
+        return True
+    finally:
+        if not producer.done():
+            producer.cancel()
+            with suppress(asyncio.CancelledError):
+                await producer
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -28,12 +247,31 @@ async def lifespan(app: FastAPI):
     if not settings.jwt_secret:
         logger.warning("JWT_SECRET not set - authentication will not work!")
     
+    # Create feedback storage clients before accepting traffic
+    await get_feedback_service().ensure_ready()
+    
     yield
     
+    # Stop the shared keep-alive pinger
+    if _ping_task is not None:
+        _ping_task.cancel()
+    
     # Clean up usage tracker
     tracker = get_usage_tracker()
     await tracker.close()
     
+    # Close the feedback storage clients
+    await get_feedback_service().close()
+    
+    # Close the shared SQLite connection (no-op if never opened)
+    await close_db()
+    
+    # Close the shared pooled HTTP client
+    await close_http_client()
+    
+    # Stop the OCR worker processes
+    await asyncio.to_thread(shutdown_ocr_pool)
+    
     logger.info("FAA Agent shutting down")
 
 
@@ -52,6 +290,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Added last so it wraps CORSMiddleware: preflights are answered before the app stack
+app.add_middleware(PreflightMiddleware)
 
 # Include routers
 app.include_router(health.router)
@@ -81,6 +321,8 @@ async def websocket_chat(
         agent: Agent type - 'faa' (default) or 'nrc'
     """
     settings = get_settings()
+    # Per-session invariants, hoisted out of the message and streaming loops
+    daily_limit = settings.daily_request_limit
     
     # Validate and get agent config
     try:
@@ -115,6 +357,9 @@ async def websocket_chat(
     
     # Check daily quota for non-admin users
     tracker = get_usage_tracker()
+    # Last known remaining quota on this connection, and the UTC day it applies to
+    local_remaining: int | None = None
+    local_day = datetime.now(timezone.utc).date()
     if not is_admin:
         if not fingerprint:
             await websocket.close(code=4001, reason="Invalid token - missing fingerprint")
@@ -123,98 +368,89 @@ async def websocket_chat(
         allowed, used, remaining = await tracker.check_quota(fingerprint)
         if not allowed:
             await websocket.accept()
-            await websocket.send_json({
-                "type": "error",
-                "content": f"You've used your {settings.daily_request_limit} daily queries. Come back tomorrow!"
-            })
+            await websocket.send_text(QUOTA_EXCEEDED_FRAME)
             await websocket.close(code=4003, reason="Daily quota exceeded")
             return
+        local_remaining = remaining
+        # Per-connection arguments bound once for every turn's reservation
+        reserve = functools.partial(
+            tracker.check_and_reserve,
+            fingerprint,
+            user_agent=user_agent,
+            ip_address=client_ip,
+        )
     
     await websocket.accept()
     logger.info(f"WebSocket connected: {conversation_id} (agent={agent_config.name}, user={user_id}..., admin={is_admin})")
     
-    # Keep-alive task to prevent idle timeout
-    async def keep_alive():
-        """Send periodic pings to keep the connection alive."""
-        try:
-            while True:
-                await asyncio.sleep(20)  # Ping every 20 seconds
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    try:
-                        await websocket.send_json({"type": "ping"})
-                    except Exception:
-                        break
-                else:
-                    break
-        except asyncio.CancelledError:
-            pass
+    # All writes after accept go through one sender (shared with the pinger)
+    sender = SafeSender(websocket)
     
-    keep_alive_task = asyncio.create_task(keep_alive())
+    # Register for the shared keep-alive pings to prevent idle timeout
+    _active_senders.add(sender)
+    ensure_ping_task()
     
     try:
         while True:
-            data = await websocket.receive_json()
+            data = await receive(websocket)
             user_message = data.get("message", "")
             
             if not user_message:
-                await websocket.send_json({"type": "error", "content": "Empty message"})
+                await sender.send_text(EMPTY_MESSAGE_FRAME)
                 continue
             
-            # Check daily quota before processing (for non-admin)
+            # Check the daily quota and count this request in one round trip
+            # (non-admin). The reservation is released if the turn fails.
+            reservation = None
             if not is_admin:
-                allowed, used, remaining = await tracker.check_quota(fingerprint)
+                today = datetime.now(timezone.utc).date()
+                if local_remaining == 0 and today == local_day:
+                    # An earlier turn on this connection used today's last request
+                    allowed = False
+                else:
+                    allowed, used, remaining, reservation = await reserve()
+                    local_remaining, local_day = remaining, today
                 if not allowed:
-                    await websocket.send_json({
-                        "type": "error",
-                        "content": f"You've used your {settings.daily_request_limit} daily queries. Come back tomorrow!"
-                    })
+                    await sender.send_text(QUOTA_EXCEEDED_FRAME)
                     await websocket.close(code=4003, reason="Daily quota exceeded")
                     return
             
             # Stream response from Claude orchestrator
             turn_completed = False
             try:
-                async for chunk in handle_conversation(conversation_id, user_message, agent_config, fingerprint):
-                    # Check if connection is still open before sending
-                    if websocket.client_state != WebSocketState.CONNECTED:
-                        logger.warning(f"WebSocket disconnected during response: {conversation_id}")
-                        break
-                    await websocket.send_json(chunk)
+                stream = handle_conversation(conversation_id, user_message, agent_config, fingerprint)
+                if not await stream_to_socket(sender, stream):
+                    logger.warning(f"WebSocket disconnected during response: {conversation_id}")
                 
                 turn_completed = True
                 
-                # Increment usage counter and send quota update (non-admin only)
+                # Send quota update (non-admin only - already counted by check_and_reserve)
                 if not is_admin:
-                    new_count = await tracker.increment_usage(
-                        fingerprint, 
-                        user_agent=user_agent,
-                        ip_address=client_ip,
+                    # Lazy %-formatting: skipped entirely when INFO is filtered out
+                    logger.info(
+                        "Turn completed for %s...: %d/%d used, %d remaining",
+                        user_id, used, daily_limit, remaining,
                     )
-                    remaining = max(0, settings.daily_request_limit - new_count)
-                    logger.info(f"Turn completed for {user_id}...: {new_count}/{settings.daily_request_limit} used, {remaining} remaining")
                     
-                    # Send quota update to frontend
-                    if websocket.client_state == WebSocketState.CONNECTED:
-                        await websocket.send_json({
-                            "type": "quota_update",
-                            "requests_used": new_count,
-                            "requests_remaining": remaining,
-                            "daily_limit": settings.daily_request_limit,
-                        })
+                    # Send quota update to frontend (no-op if the socket closed)
+                    await sender.send({
+                        "type": "quota_update",
+                        "requests_used": used,
+                        "requests_remaining": remaining,
+                        "daily_limit": daily_limit,
+                    })
                 
                 # Signal end of response (if still connected)
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_json({"type": "done"})
+                await sender.send_text(DONE_FRAME)
             except Exception as e:
                 logger.error(f"Error during conversation: {e}")
-                if websocket.client_state == WebSocketState.CONNECTED:
-                    await websocket.send_json({"type": "error", "content": str(e)})
+                if reservation and not turn_completed:
+                    await tracker.release(fingerprint, reservation)
+                    # The slot is free again; let the next turn ask storage
+                    local_remaining = None
+                await sender.send({"type": "error", "content": str(e)})
             
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {conversation_id}")
     finally:
-        keep_alive_task.cancel()
-        try:
-            await keep_alive_task
-        except asyncio.CancelledError:
-            pass
+        _active_senders.discard(sender)
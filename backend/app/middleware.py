@@ -0,0 +1,56 @@
+"""
+Pure-ASGI middleware that runs ahead of the FastAPI stack.
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Matches CORSMiddleware(allow_methods=["*"])
+PREFLIGHT_ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+
+class PreflightMiddleware:
+    """
+    Answer CORS preflight requests without entering the rest of the app.
+
+    Mirrors the permissive CORSMiddleware config in main.py (all origins,
+    methods and headers, with credentials): the origin and requested headers
+    are echoed back, everything else is a header list encoded once.
+    Non-preflight requests pass straight through, so CORSMiddleware still
+    decorates regular responses.
+    """
+
+    def __init__(self, app: ASGIApp, max_age: int = 600):
+        self.app = app
+        self._static_headers = [
+            (b"access-control-allow-methods", PREFLIGHT_ALLOW_METHODS),
+            (b"access-control-allow-credentials", b"true"),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"vary", b"Origin"),
+        ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        origin = None
+        requested_headers = None
+        is_preflight = False
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                is_preflight = True
+            elif name == b"access-control-request-headers":
+                requested_headers = value
+
+        if origin is None or not is_preflight:
+            await self.app(scope, receive, send)
+            return
+
+        headers = [*self._static_headers, (b"access-control-allow-origin", origin)]
+        if requested_headers is not None:
+            headers.append((b"access-control-allow-headers", requested_headers))
+
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
@@ -0,0 +1,23 @@
+"""
+Response classes shared by the API routers.
+"""
+
+from datetime import datetime
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+
+def _orjson_default(obj: Any) -> Any:
+    # Azure Tables returns datetime subclasses, which orjson doesn't serialize natively
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered with orjson (datetimes as ISO strings)."""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_orjson_default)
@@ -4,10 +4,11 @@ Protected endpoints for administrators only.
 """
 
 import logging
-from typing import Any
+from typing import Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from app.responses import ORJSONResponse
 from app.routers.auth import verify_admin_token
 from app.services.usage import get_usage_tracker
 from app.services.feedback import get_feedback_service
@@ -16,34 +17,66 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 
+# Records per page for the admin listings
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
 
-@router.get("/usage")
-async def get_all_usage(admin_code: str = Depends(verify_admin_token)) -> dict[str, Any]:
+# Longest window for the recent-feedback listing
+MAX_FEEDBACK_DAYS = 366
+
+
+@router.get("/usage", response_class=ORJSONResponse)
+async def get_all_usage(
+    admin_code: str = Depends(verify_admin_token),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+) -> ORJSONResponse:
     """
-    Get all usage records across all dates.
+    Get one page of usage records.
     
-    Returns usage sorted by date descending (newest first).
+    Pages are in storage order (oldest date first); records within a page
+    are sorted by date descending. Pass next_cursor back as cursor to get
+    the following page.
     Requires admin authorization.
     """
     logger.info(f"Admin {admin_code[:8]}... fetching usage data")
     
     tracker = get_usage_tracker()
-    records = await tracker.list_all_usage()
+    try:
+        records, next_cursor = await tracker.list_usage_page(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {"usage": records}
+    return ORJSONResponse({"usage": records, "next_cursor": next_cursor})
 
 
-@router.get("/feedback")
-async def get_all_feedback(admin_code: str = Depends(verify_admin_token)) -> dict[str, Any]:
+@router.get("/feedback", response_class=ORJSONResponse)
+async def get_all_feedback(
+    admin_code: str = Depends(verify_admin_token),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    days: Optional[int] = Query(None, ge=1, le=MAX_FEEDBACK_DAYS),
+) -> ORJSONResponse:
     """
-    Get all feedback records.
+    Get one page of feedback records.
     
-    Returns feedback sorted by date descending (newest first).
+    Pages are in storage order (oldest date first); records within a page
+    are sorted newest first. Pass next_cursor back as cursor to get the
+    following page.
+    With days, returns every record from the last `days` days in one
+    response, newest first (limit and cursor are ignored).
     Requires admin authorization.
     """
     logger.info(f"Admin {admin_code[:8]}... fetching feedback data")
     
     service = get_feedback_service()
-    records = await service.list_all_feedback()
+    if days is not None:
+        records = await service.list_all_feedback(days=days)
+        return ORJSONResponse({"feedback": records, "next_cursor": None})
+    
+    try:
+        records, next_cursor = await service.list_feedback_page(limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    return {"feedback": records}
+    return ORJSONResponse({"feedback": records, "next_cursor": next_cursor})
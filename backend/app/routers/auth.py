@@ -5,13 +5,20 @@ Handles fingerprint validation, JWT issuance, and admin authentication.
 
 from __future__ import annotations
 
+import hashlib
+import hmac
 import logging
-from datetime import datetime, timedelta
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Annotated, Optional
 
+import jwt
+from cachetools import TTLCache
 from fastapi import APIRouter, HTTPException, Depends, Header
+from jwt import InvalidTokenError as JWTError
 from pydantic import BaseModel
-from jose import jwt, JWTError
 
 from app.config import get_settings
 from app.services.usage import get_usage_tracker
@@ -23,6 +30,17 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 # JWT settings
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRY_DAYS = 1  # Fingerprint tokens expire daily (quota resets)
+ADMIN_JWT_EXPIRY_DAYS = 30  # Admin tokens last longer
+_FP_DELTA = timedelta(days=JWT_EXPIRY_DAYS)
+_ADMIN_DELTA = timedelta(days=ADMIN_JWT_EXPIRY_DAYS)
+
+# Recently verified tokens, keyed by a 16-byte blake2b digest of the token.
+# Only successful decodes are cached, so tampered tokens are always re-checked.
+JWT_CACHE_TTL = 30  # seconds
+_jwt_cache: TTLCache[bytes, dict] = TTLCache(maxsize=10000, ttl=JWT_CACHE_TTL)
+_jwt_cache_lock = threading.Lock()
+# Admin code (and exp) per verified admin token, for verify_admin_token
+_admin_token_cache: TTLCache[bytes, tuple[str, float]] = TTLCache(maxsize=1000, ttl=JWT_CACHE_TTL)
 
 
 class ValidateCodeRequest(BaseModel):
@@ -49,22 +67,45 @@ class FingerprintResponse(BaseModel):
     daily_limit: int
 
 
-def get_admin_codes() -> set[str]:
-    """Get set of admin codes from environment."""
+@lru_cache(maxsize=1)
+def get_admin_codes() -> frozenset[str]:
+    """
+    Get set of admin codes from environment.
+    
+    Parsed once per process; call get_admin_codes.cache_clear() after
+    changing settings (e.g. in tests).
+    """
     settings = get_settings()
     if not settings.admin_codes:
-        return set()
-    return set(code.strip() for code in settings.admin_codes.split(",") if code.strip())
+        return frozenset()
+    return frozenset(code.strip() for code in settings.admin_codes.split(",") if code.strip())
+
+
+def _admin_code_digest(code: str) -> bytes:
+    """Keyed, fixed-length digest of an access code."""
+    return hmac.new(get_settings().jwt_secret.encode(), code.encode(), "sha256").digest()
+
+
+@lru_cache(maxsize=1)
+def get_admin_code_digests() -> frozenset[bytes]:
+    """
+    HMAC-SHA256 digests of the admin codes, keyed with the JWT secret.
+    
+    Membership checks hash a fixed 32-byte value instead of the raw
+    variable-length code. Clear together with get_admin_codes().
+    """
+    return frozenset(_admin_code_digest(code) for code in get_admin_codes())
 
 
 def create_jwt_token_for_fingerprint(fingerprint: str) -> str:
     """Create a JWT token for a fingerprint-based user."""
     settings = get_settings()
+    now = datetime.now(timezone.utc)
     payload = {
         "fingerprint": fingerprint,
         "is_admin": False,
-        "exp": datetime.utcnow() + timedelta(days=JWT_EXPIRY_DAYS),
-        "iat": datetime.utcnow(),
+        "exp": now + _FP_DELTA,
+        "iat": now,
     }
     return jwt.encode(payload, settings.jwt_secret, algorithm=JWT_ALGORITHM)
 
@@ -72,11 +113,12 @@ def create_jwt_token_for_fingerprint(fingerprint: str) -> str:
 def create_jwt_token_for_admin(code: str, fingerprint: Optional[str] = None) -> str:
     """Create a JWT token for an admin user."""
     settings = get_settings()
+    now = datetime.now(timezone.utc)
     payload = {
         "code": code,
         "is_admin": True,
-        "exp": datetime.utcnow() + timedelta(days=30),  # Admin tokens last longer
-        "iat": datetime.utcnow(),
+        "exp": now + _ADMIN_DELTA,
+        "iat": now,
     }
     # Include fingerprint if provided (enables My Documents feature for admin)
     if fingerprint:
@@ -84,15 +126,41 @@ def create_jwt_token_for_admin(code: str, fingerprint: Optional[str] = None) ->
     return jwt.encode(payload, settings.jwt_secret, algorithm=JWT_ALGORITHM)
 
 
+def _token_key(token: str) -> bytes:
+    """Cache key for a token (blake2b digest, so raw tokens aren't kept as keys)."""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
 def decode_jwt_token(token: str) -> Optional[dict]:
-    """Decode and validate a JWT token. Returns None if invalid."""
+    """
+    Decode and validate a JWT token. Returns None if invalid.
+    
+    Valid payloads are cached for up to JWT_CACHE_TTL seconds (never past the
+    token's own expiry), so repeated checks of the same token skip the HMAC.
+    """
+    key = _token_key(token)
+    now = time.time()
+    with _jwt_cache_lock:
+        payload = _jwt_cache.get(key)
+    if payload is not None and payload.get("exp", 0) > now:
+        return payload
+    
     settings = get_settings()
     try:
-        payload = jwt.decode(token, settings.jwt_secret, algorithms=[JWT_ALGORITHM])
-        return payload
+        payload = jwt.decode(
+            token,
+            settings.jwt_secret,
+            algorithms=[JWT_ALGORITHM],
+            options={"require": ["exp", "iat"]},
+        )
     except JWTError as e:
         logger.warning(f"Invalid JWT token: {e}")
         return None
+    
+    if payload.get("exp", 0) > now:
+        with _jwt_cache_lock:
+            _jwt_cache[key] = payload
+    return payload
 
 
 @router.post("/fingerprint", response_model=FingerprintResponse)
@@ -145,10 +213,10 @@ async def validate_code(request: ValidateCodeRequest):
     """
     code = request.code.strip().upper()
     
-    admin_codes = get_admin_codes()
-    
-    # Check if it's an admin code
-    if code in admin_codes:
+    # Check if it's an admin code. Empty input or no configured codes is
+    # rejected without computing an HMAC.
+    admin_digests = get_admin_code_digests()
+    if code and admin_digests and _admin_code_digest(code) in admin_digests:
         logger.info(f"Admin code validated: {code[:8]}... (fingerprint={request.fingerprint[:8] if request.fingerprint else 'none'})")
         token = create_jwt_token_for_admin(code, request.fingerprint)
         return ValidateCodeResponse(
@@ -174,6 +242,13 @@ async def verify_admin_token(authorization: Annotated[Optional[str], Header()] =
     else:
         token = authorization
     
+    # Dashboard polling re-sends the same token; serve recent verifications from cache
+    key = _token_key(token)
+    with _jwt_cache_lock:
+        cached = _admin_token_cache.get(key)
+    if cached is not None and cached[1] > time.time():
+        return cached[0]
+    
     payload = decode_jwt_token(token)
     if not payload:
         raise HTTPException(status_code=401, detail="Invalid token")
@@ -181,4 +256,7 @@ async def verify_admin_token(authorization: Annotated[Optional[str], Header()] =
     if not payload.get("is_admin"):
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    return payload["code"]
+    code = payload["code"]
+    with _jwt_cache_lock:
+        _admin_token_cache[key] = (code, payload["exp"])
+    return code
@@ -5,40 +5,65 @@ Handles PDF upload, text extraction (with OCR fallback), chunking,
 embedding generation, and indexing via the search proxy.
 """
 
+import asyncio
+import gzip
 import hashlib
 import logging
-import uuid
+import multiprocessing
+import os
+import re
+import secrets
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 from io import BytesIO
-from typing import Optional, List
+from itertools import repeat
+from typing import BinaryIO, Optional, List
 
 import fitz  # PyMuPDF
 import httpx
+import orjson
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
 from pydantic import BaseModel
 
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.http_client import get_http_client
 from app.services.indexer import generate_embedding, generate_embeddings_batch
 
 # OCR imports (optional - graceful fallback if not available)
 try:
     import pytesseract
-    from pdf2image import convert_from_bytes
     OCR_AVAILABLE = True
 except ImportError:
     OCR_AVAILABLE = False
 
+# In-process tesseract bindings (optional - avoids a subprocess + model load per page)
+try:
+    from tesserocr import PyTessBaseAPI
+    TESSEROCR_AVAILABLE = True
+except ImportError:
+    TESSEROCR_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 
 # Limits
 MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
+UPLOAD_READ_CHUNK = 1024 * 1024  # Read uploads 1MB at a time
 MAX_DOCUMENTS_PER_USER = 20
 MAX_CHUNKS_PER_DOCUMENT = 100
 CHUNK_SIZE_CHARS = 4000  # ~1000 tokens
 MIN_CHARS_PER_PAGE = 100  # Below this, use OCR
 MAX_OCR_PAGES = 200  # Max pages to OCR (with 2 vCPU this should work)
+OCR_WORK_ITEM_PAGES = 16  # Max pages rendered + OCR'd per pool task
+MAX_OCR_WORKERS = 4  # Processes in the shared OCR pool (also capped by CPU count)
+INDEX_GZIP_LEVEL = 6  # Compression level for index payloads sent to the search proxy
+
+# Sentence boundary inside an oversized paragraph: the space after a period, or a line break
+_SENTENCE_BREAK = re.compile(r"(?<=\.) |\n")
 
 
 class DocumentUploadResponse(BaseModel):
@@ -67,9 +92,40 @@ class DocumentsListResponse(BaseModel):
     total_count: int
 
 
-def compute_file_hash(content: bytes) -> str:
-    """Compute SHA-256 hash of file content."""
-    return hashlib.sha256(content).hexdigest()
+def compute_file_hash(content: bytes | BinaryIO) -> str:
+    """
+    Compute SHA-256 hash of file content.
+    
+    Accepts raw bytes or a binary file object. hashlib.file_digest hashes an
+    in-memory buffer in a single OpenSSL call (SHA-NI where available)
+    without copying it.
+    """
+    fileobj = BytesIO(content) if isinstance(content, (bytes, bytearray)) else content
+    return hashlib.file_digest(fileobj, "sha256").hexdigest()
+
+
+async def read_upload(file: UploadFile) -> tuple[bytes, str]:
+    """
+    Read an upload in chunks and hash the buffered result.
+    
+    Stops as soon as the upload passes MAX_FILE_SIZE instead of reading
+    the whole body first.
+    
+    Returns:
+        (content, sha256 hex digest)
+    """
+    buf = BytesIO()
+    while chunk := await file.read(UPLOAD_READ_CHUNK):
+        if buf.tell() + len(chunk) > MAX_FILE_SIZE:
+            raise HTTPException(
+                status_code=400, 
+                detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)} MB"
+            )
+        buf.write(chunk)
+    buf.seek(0)
+    # Hash before getvalue(): getvalue() then shares the buffer instead of copying it
+    file_hash = compute_file_hash(buf)
+    return buf.getvalue(), file_hash
 
 
 def extract_text_from_pdf(pdf_bytes: bytes) -> tuple[str, int]:
@@ -78,81 +134,224 @@ def extract_text_from_pdf(pdf_bytes: bytes) -> tuple[str, int]:
     
     Strategy:
     1. Try PyMuPDF text extraction (fast, works for digital PDFs)
-    2. If text is too sparse (likely a scanned PDF), use OCR via pytesseract
+    2. If text is too sparse (likely a scanned PDF), OCR only the pages
+       with too little text, spread across a process pool
     
     Returns:
         (full_text, page_count)
     """
     doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-    page_count = len(doc)
-    
-    # First pass: try regular text extraction
-    all_text = []
-    total_chars = 0
-    
-    for page in doc:
-        text = page.get_text("text")
-        all_text.append(text)
-        total_chars += len(text.strip())
-    
-    doc.close()
-    
-    # Check if we got enough text
-    avg_chars_per_page = total_chars / max(page_count, 1)
-    
-    if avg_chars_per_page >= MIN_CHARS_PER_PAGE:
-        # Good text extraction - this is a digital PDF
-        logger.info(f"Digital PDF: extracted {total_chars} chars from {page_count} pages ({avg_chars_per_page:.0f} chars/page)")
-        return "\n\n".join(all_text), page_count
-    
-    # Low text content - likely a scanned PDF, try OCR
-    logger.info(f"Low text content ({avg_chars_per_page:.0f} chars/page), attempting OCR...")
-    
-    if not OCR_AVAILABLE:
-        logger.warning("OCR not available (pytesseract/pdf2image not installed). Returning sparse text.")
-        return "\n\n".join(all_text), page_count
+    try:
+        page_count = len(doc)
+        
+        # First pass: try regular text extraction. Stripped lengths are
+        # measured once here and reused for the OCR decision and stats.
+        all_text = []
+        page_chars = []
+        
+        for page in doc:
+            text = page.get_text("text")
+            all_text.append(text)
+            page_chars.append(len(text.strip()))
+        total_chars = sum(page_chars)
+        
+        # Check if we got enough text
+        avg_chars_per_page = total_chars / max(page_count, 1)
+        
+        if avg_chars_per_page >= MIN_CHARS_PER_PAGE:
+            # Good text extraction - this is a digital PDF
+            logger.info(f"Digital PDF: extracted {total_chars} chars from {page_count} pages ({avg_chars_per_page:.0f} chars/page)")
+            return "\n\n".join(all_text), page_count
+        
+        # Low text content - likely a scanned PDF, try OCR
+        logger.info(f"Low text content ({avg_chars_per_page:.0f} chars/page), attempting OCR...")
+        
+        if not OCR_AVAILABLE:
+            logger.warning("OCR not available (pytesseract not installed). Returning sparse text.")
+            return "\n\n".join(all_text), page_count
+        
+        # Pages that already carry digital text are kept as-is
+        ocr_pages = [i for i, chars in enumerate(page_chars) if chars < MIN_CHARS_PER_PAGE]
+        
+        # Limit OCR to avoid timeout on very large scanned documents
+        if len(ocr_pages) > MAX_OCR_PAGES:
+            logger.warning(f"Scanned PDF too large for OCR ({len(ocr_pages)} pages > {MAX_OCR_PAGES} max). Returning sparse text.")
+            raise ValueError(f"Scanned PDFs over {MAX_OCR_PAGES} pages are not supported. This document has {len(ocr_pages)} scanned pages. Please upload a text-based PDF or a smaller scanned document.")
+        
+        try:
+            return _extract_text_with_ocr(pdf_bytes, all_text, page_chars, ocr_pages)
+        except Exception as e:
+            logger.error(f"OCR failed: {e}. Falling back to sparse text.")
+            return "\n\n".join(all_text), page_count
+    finally:
+        doc.close()
+
+
+# Per-worker tesserocr handle, created by _init_ocr_worker
+_tess_api = None
+
+# One long-lived OCR pool shared by all uploads, created on first use
+_ocr_pool: ProcessPoolExecutor | None = None
+_ocr_pool_lock = threading.Lock()
+
+
+def _ocr_workers() -> int:
+    """Size of the shared OCR pool."""
+    return max(1, min(os.cpu_count() or 1, MAX_OCR_WORKERS))
+
+
+def _get_ocr_pool() -> ProcessPoolExecutor:
+    """
+    Get the shared OCR process pool.
     
-    # Limit OCR to avoid timeout on very large scanned documents
-    if page_count > MAX_OCR_PAGES:
-        logger.warning(f"Scanned PDF too large for OCR ({page_count} pages > {MAX_OCR_PAGES} max). Returning sparse text.")
-        raise ValueError(f"Scanned PDFs over {MAX_OCR_PAGES} pages are not supported. This document has {page_count} pages. Please upload a text-based PDF or a smaller scanned document.")
+    Workers are started with forkserver (spawn where unavailable), never by
+    forking the threaded server process, which can deadlock on locks other
+    threads hold at fork time.
+    """
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is None:
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+            _ocr_pool = ProcessPoolExecutor(
+                max_workers=_ocr_workers(),
+                mp_context=context,
+                initializer=_init_ocr_worker,
+            )
+        return _ocr_pool
+
+
+def _discard_ocr_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken pool so the next upload starts a fresh one."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is pool:
+            _ocr_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_ocr_pool() -> None:
+    """Stop the shared OCR pool (no-op if never started)."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        pool, _ocr_pool = _ocr_pool, None
+    if pool is not None:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def _init_ocr_worker() -> None:
+    """
+    Prepare a pool worker for OCR.
     
+    Keeps tesseract single-threaded so workers don't oversubscribe cores, and
+    loads the English model once per worker when tesserocr is installed.
+    """
+    global _tess_api
+    os.environ["OMP_THREAD_LIMIT"] = "1"
+    if TESSEROCR_AVAILABLE:
+        try:
+            _tess_api = PyTessBaseAPI(lang='eng')
+        except RuntimeError as e:
+            logger.warning(f"tesserocr init failed ({e}), using pytesseract")
+
+
+def _ocr_one_page(image_path: str) -> str:
+    """OCR a single rendered page (runs in a pool worker), then delete it."""
     try:
-        return _extract_text_with_ocr(pdf_bytes, page_count)
-    except Exception as e:
-        logger.error(f"OCR failed: {e}. Falling back to sparse text.")
-        return "\n\n".join(all_text), page_count
+        if _tess_api is not None:
+            _tess_api.SetImageFile(image_path)
+            return _tess_api.GetUTF8Text()
+        return pytesseract.image_to_string(image_path, lang='eng')
+    finally:
+        os.remove(image_path)
 
 
-def _extract_text_with_ocr(pdf_bytes: bytes, page_count: int) -> tuple[str, int]:
+def _ocr_work_item(pdf_path: str, pages: List[int], tmpdir: str) -> List[str]:
     """
-    Extract text from scanned PDF using OCR (pytesseract + pdf2image).
+    Render and OCR a slice of pages (runs in a pool worker).
+    
+    Each worker opens the PDF itself, so rendering is spread across the pool
+    rather than done page by page in the parent.
+    """
+    texts = []
+    with fitz.open(pdf_path) as doc:
+        for i in pages:
+            # Grayscale PGM: a third of the RGB pixel data and no PNG encode/decode
+            image_path = os.path.join(tmpdir, f"page-{i:04d}.pgm")
+            pixmap = doc.load_page(i).get_pixmap(dpi=100, colorspace=fitz.csGRAY)  # Lower DPI = faster
+            pixmap.save(image_path)
+            texts.append(_ocr_one_page(image_path))
+    return texts
+
+
+def _extract_text_with_ocr(
+    pdf_bytes: bytes,
+    page_texts: List[str],
+    page_chars: List[int],
+    ocr_pages: List[int],
+) -> tuple[str, int]:
+    """
+    OCR the given pages of a PDF and merge them with the digital text.
+    
+    The PDF is written once to a temp directory and the pages are split into
+    work items of up to OCR_WORK_ITEM_PAGES, sized so every pool worker gets
+    a share. Each worker renders its pages to grayscale PGMs and OCRs them,
+    so only the pages currently being OCR'd are ever loaded.
     
     Args:
         pdf_bytes: Raw PDF file bytes
-        page_count: Number of pages (for logging)
+        page_texts: Text extracted per page on the first pass
+        page_chars: Stripped character count per page from the first pass
+        ocr_pages: Indexes of the pages to OCR
         
     Returns:
         (full_text, page_count)
     """
-    # Convert PDF pages to images at lower DPI for speed
-    logger.info(f"Converting {page_count} PDF pages to images for OCR...")
-    images = convert_from_bytes(pdf_bytes, dpi=100, fmt='png')  # Lower DPI = faster
-    
-    all_text = []
-    for i, image in enumerate(images):
-        page_text = pytesseract.image_to_string(image, lang='eng')
-        all_text.append(page_text)
-        if (i + 1) % 5 == 0:
-            logger.info(f"OCR progress: {i + 1}/{page_count} pages")
-    
-    total_chars = sum(len(t.strip()) for t in all_text)
+    page_count = len(page_texts)
+    all_text = list(page_texts)
+    total_chars = sum(page_chars)
+    logger.info(f"OCR'ing {len(ocr_pages)}/{page_count} PDF pages...")
+    
+    max_workers = min(_ocr_workers(), max(len(ocr_pages), 1))
+    item_size = max(1, min(OCR_WORK_ITEM_PAGES, -(-len(ocr_pages) // max_workers)))
+    work_items = [ocr_pages[i:i + item_size] for i in range(0, len(ocr_pages), item_size)]
+    
+    with tempfile.TemporaryDirectory(prefix="ocr-") as tmpdir:
+        pdf_path = os.path.join(tmpdir, "source.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(pdf_bytes)
+        
+        pool = _get_ocr_pool()
+        try:
+            results = pool.map(_ocr_work_item, repeat(pdf_path), work_items, repeat(tmpdir))
+            
+            # Collect in page order, replacing the sparse text for each OCR'd page
+            done = 0
+            for pages, texts in zip(work_items, results):
+                for i, text in zip(pages, texts):
+                    all_text[i] = text
+                    total_chars += len(text.strip()) - page_chars[i]
+                done += len(pages)
+                logger.info(f"OCR progress: {done}/{len(ocr_pages)} pages")
+        except BrokenProcessPool:
+            _discard_ocr_pool(pool)
+            raise
+    
     avg_chars = total_chars / max(page_count, 1)
     logger.info(f"OCR complete: extracted {total_chars} chars from {page_count} pages ({avg_chars:.0f} chars/page)")
     
     return "\n\n".join(all_text), page_count
 
 
+def _iter_sentences(para: str):
+    """Yield the sentences of a paragraph without building a split copy of it."""
+    start = 0
+    for match in _SENTENCE_BREAK.finditer(para):
+        yield para[start:match.start()]
+        start = match.end()
+    yield para[start:]
+
+
 def chunk_text(text: str, chunk_size: int = CHUNK_SIZE_CHARS) -> List[str]:
     """
     Split text into chunks of approximately chunk_size characters.
@@ -176,8 +375,7 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE_CHARS) -> List[str]:
         
         # If single paragraph is too large, split by sentences
         if para_size > chunk_size:
-            sentences = para.replace(". ", ".\n").split("\n")
-            for sentence in sentences:
+            for sentence in _iter_sentences(para):
                 sentence = sentence.strip()
                 if not sentence:
                     continue
@@ -208,44 +406,34 @@ def chunk_text(text: str, chunk_size: int = CHUNK_SIZE_CHARS) -> List[str]:
     return chunks[:MAX_CHUNKS_PER_DOCUMENT]
 
 
-async def check_duplicate(fingerprint: str, file_hash: str, index: str) -> bool:
-    """Check if user already uploaded a document with this hash."""
-    settings = get_settings()
+async def get_user_documents(
+    fingerprint: str,
+    index: str,
+    settings: Optional[Settings] = None,
+) -> tuple[int, set[str]]:
+    """
+    Fetch the user's document list once for upload preflight.
     
-    try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{settings.search_proxy_url}/documents",
-                params={"fingerprint": fingerprint, "index": index},
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            for doc in data.get("documents", []):
-                if doc.get("file_hash") == file_hash:
-                    return True
-            return False
-    except Exception as e:
-        logger.warning(f"Duplicate check failed: {e}")
-        return False
-
-
-async def check_document_limit(fingerprint: str, index: str) -> int:
-    """Check how many documents user has uploaded. Returns current count."""
-    settings = get_settings()
+    Returns (total_count, file hashes) so the limit and duplicate checks
+    share a single search-proxy call. Fails open with (0, empty set).
+    """
+    settings = settings or get_settings()
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{settings.search_proxy_url}/documents",
-                params={"fingerprint": fingerprint, "index": index},
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("total_count", 0)
+        client = get_http_client()
+        response = await client.get(
+            f"{settings.search_proxy_url}/documents",
+            timeout=30.0,
+            params={"fingerprint": fingerprint, "index": index},
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        hashes = {doc["file_hash"] for doc in data.get("documents", []) if doc.get("file_hash")}
+        return data.get("total_count", 0), hashes
     except Exception as e:
-        logger.warning(f"Document count check failed: {e}")
-        return 0
+        logger.warning(f"Document preflight check failed: {e}")
+        return 0, set()
 
 
 async def index_document_chunks(
@@ -256,6 +444,7 @@ async def index_document_chunks(
     chunks: List[str],
     page_count: int,
     file_hash: str,
+    settings: Optional[Settings] = None,
 ) -> int:
     """
     Index document chunks via the search proxy.
@@ -264,7 +453,7 @@ async def index_document_chunks(
     
     Returns number of successfully indexed chunks.
     """
-    settings = get_settings()
+    settings = settings or get_settings()
     uploaded_at = datetime.now(timezone.utc).isoformat()
     
     # Generate all embeddings in batches (much faster than sequential)
@@ -273,16 +462,16 @@ async def index_document_chunks(
     logger.info(f"Embeddings complete. Building documents...")
     
     documents = []
+    chunk_id_prefix = f"{doc_id}-chunk"
+    chunk_total = len(chunks)
     for i, (chunk_text, embedding) in enumerate(zip(chunks, embeddings)):
-        chunk_id = f"{doc_id}-chunk{i}"
-        
         doc = {
-            "id": chunk_id,
+            "id": chunk_id_prefix + str(i),
             "title": filename,
             "content": chunk_text,
             "source": "personal",
             "doc_type": "user_upload",
-            "citation": f"{filename} (chunk {i + 1}/{len(chunks)})",
+            "citation": f"{filename} (chunk {i + 1}/{chunk_total})",
             "owner_fingerprint": fingerprint,
             "uploaded_at": uploaded_at,
             "page_count": page_count,
@@ -296,19 +485,25 @@ async def index_document_chunks(
     
     # Send to search proxy
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:  # Longer timeout for many chunks
-            response = await client.post(
-                f"{settings.search_proxy_url}/index",
-                headers={"Content-Type": "application/json"},
-                json={
-                    "index": index,
-                    "fingerprint": fingerprint,
-                    "documents": documents,
-                },
-            )
-            response.raise_for_status()
-            data = response.json()
-            return data.get("indexed_count", 0)
+        # Pre-serialize with orjson: the body carries a 1024-float vector per chunk.
+        # Float-heavy JSON gzips several-fold; compress off the event loop.
+        payload = orjson.dumps({
+            "index": index,
+            "fingerprint": fingerprint,
+            "documents": documents,
+        })
+        body = await asyncio.to_thread(gzip.compress, payload, INDEX_GZIP_LEVEL)
+        
+        client = get_http_client()
+        response = await client.post(
+            f"{settings.search_proxy_url}/index",
+            timeout=120.0,  # Longer timeout for many chunks
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            content=body,
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data.get("indexed_count", 0)
     except Exception as e:
         logger.error(f"Failed to index document chunks: {e}")
         raise HTTPException(status_code=502, detail=f"Failed to index document: {e}")
@@ -346,21 +541,14 @@ async def upload_document(
     if file.content_type not in ["application/pdf", "application/x-pdf"]:
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
-    # Read file content
-    content = await file.read()
-    
-    # Validate file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400, 
-            detail=f"File too large. Maximum size is {MAX_FILE_SIZE // (1024*1024)} MB"
-        )
+    # Read file content, validating size as it streams in, and hash it for deduplication
+    content, file_hash = await read_upload(file)
     
-    # Compute file hash for deduplication
-    file_hash = compute_file_hash(content)
+    # Check the document limit and duplicates before the expensive text
+    # extraction, so rejected uploads never get OCR'd
+    current_count, existing_hashes = await get_user_documents(fingerprint, index, settings)
     
     # Check document limit
-    current_count = await check_document_limit(fingerprint, index)
     if current_count >= MAX_DOCUMENTS_PER_USER:
         raise HTTPException(
             status_code=400,
@@ -368,17 +556,16 @@ async def upload_document(
         )
     
     # Check for duplicate
-    if await check_duplicate(fingerprint, file_hash, index):
+    if file_hash in existing_hashes:
         raise HTTPException(
             status_code=409,
             detail="Document already uploaded"
         )
     
-    # Extract text from PDF
+    # Extract text (CPU-bound, in a worker thread)
     logger.info(f"Processing PDF: {file.filename} ({len(content)} bytes)")
-    
     try:
-        full_text, page_count = extract_text_from_pdf(content)
+        full_text, page_count = await asyncio.to_thread(extract_text_from_pdf, content)
     except Exception as e:
         logger.error(f"PDF extraction failed: {e}")
         raise HTTPException(status_code=400, detail=f"Failed to process PDF: {e}")
@@ -389,8 +576,8 @@ async def upload_document(
             detail="Could not extract text from PDF. The file may be image-based or corrupted."
         )
     
-    # Chunk text
-    chunks = chunk_text(full_text)
+    # Chunk text (off the event loop: large string work on multi-MB documents)
+    chunks = await asyncio.to_thread(chunk_text, full_text)
     
     if not chunks:
         raise HTTPException(
@@ -401,7 +588,7 @@ async def upload_document(
     logger.info(f"Extracted {len(full_text)} chars, {len(chunks)} chunks from {page_count} pages")
     
     # Generate document ID
-    doc_id = f"{fingerprint[:8]}-{uuid.uuid4().hex[:8]}"
+    doc_id = f"{fingerprint[:8]}-{secrets.token_hex(4)}"
     
     # Index chunks
     indexed_count = await index_document_chunks(
@@ -412,6 +599,7 @@ async def upload_document(
         chunks=chunks,
         page_count=page_count,
         file_hash=file_hash,
+        settings=settings,
     )
     
     logger.info(f"Indexed {indexed_count} chunks for document {doc_id}")
@@ -434,18 +622,19 @@ async def list_documents(fingerprint: str, index: str = "faa-agent"):
     settings = get_settings()
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(
-                f"{settings.search_proxy_url}/documents",
-                params={"fingerprint": fingerprint, "index": index},
-            )
-            response.raise_for_status()
-            data = response.json()
-            
-            return DocumentsListResponse(
-                documents=[DocumentInfo(**doc) for doc in data.get("documents", [])],
-                total_count=data.get("total_count", 0),
-            )
+        client = get_http_client()
+        response = await client.get(
+            f"{settings.search_proxy_url}/documents",
+            timeout=30.0,
+            params={"fingerprint": fingerprint, "index": index},
+        )
+        response.raise_for_status()
+        data = response.json()
+        
+        return DocumentsListResponse(
+            documents=[DocumentInfo(**doc) for doc in data.get("documents", [])],
+            total_count=data.get("total_count", 0),
+        )
     except httpx.ConnectError:
         raise HTTPException(status_code=502, detail="Cannot connect to search service")
     except Exception as e:
@@ -462,19 +651,20 @@ async def delete_document(document_id: str, fingerprint: str, index: str = "faa-
     settings = get_settings()
     
     try:
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.delete(
-                f"{settings.search_proxy_url}/documents/{document_id}",
-                params={"fingerprint": fingerprint, "index": index},
-            )
-            
-            if response.status_code == 404:
-                raise HTTPException(status_code=404, detail="Document not found")
-            if response.status_code == 403:
-                raise HTTPException(status_code=403, detail="Cannot delete document owned by another user")
-            
-            response.raise_for_status()
-            return response.json()
+        client = get_http_client()
+        response = await client.delete(
+            f"{settings.search_proxy_url}/documents/{document_id}",
+            timeout=30.0,
+            params={"fingerprint": fingerprint, "index": index},
+        )
+        
+        if response.status_code == 404:
+            raise HTTPException(status_code=404, detail="Document not found")
+        if response.status_code == 403:
+            raise HTTPException(status_code=403, detail="Cannot delete document owned by another user")
+        
+        response.raise_for_status()
+        return response.json()
             
     except HTTPException:
         raise
@@ -7,12 +7,14 @@ Caching reduces API calls and enables progressive indexing.
 
 from __future__ import annotations
 
-import json
+import asyncio
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from typing import Any, Optional
 
+import orjson
+from cachetools import TTLCache
 from azure.storage.blob.aio import BlobServiceClient, ContainerClient
 from azure.core.exceptions import ResourceNotFoundError
 
@@ -20,6 +22,10 @@ from app.config import get_settings
 
 logger = logging.getLogger(__name__)
 
+# In-process layer in front of Blob Storage for the hottest documents
+MEMORY_CACHE_SIZE = 1024
+MEMORY_CACHE_TTL = 600  # seconds
+
 
 @dataclass
 class CachedDocument:
@@ -54,6 +60,9 @@ class DocumentCache:
         self._client: BlobServiceClient | None = None
         self._container: ContainerClient | None = None
         self._settings = get_settings()
+        # Strong refs to in-flight hit-count updates so they aren't GC'd mid-flight
+        self._pending: set[asyncio.Task] = set()
+        self._mem: TTLCache[str, CachedDocument] = TTLCache(maxsize=MEMORY_CACHE_SIZE, ttl=MEMORY_CACHE_TTL)
     
     async def _get_container(self) -> ContainerClient:
         """Get or create the blob container client."""
@@ -110,38 +119,45 @@ class DocumentCache:
         Get document from cache.
         
         Returns None if not found. Increments hit count.
+        
+        Recently read documents are served from an in-process TTL cache;
+        only misses go to Blob Storage. The hit count lives in blob metadata
+        and is bumped in the background either way.
         """
         container = await self._get_container()
         blob = container.get_blob_client(key)
         
+        cached = self._mem.get(key)
+        if cached is not None:
+            cached.hit_count += 1
+            self._schedule_hit(blob, key, cached.hit_count)
+            logger.info(f"Cache hit (memory): {key} (hits: {cached.hit_count})")
+            return cached
+        
         try:
             download = await blob.download_blob()
-            data = json.loads(await download.readall())
+            data = orjson.loads(await download.readall())
             
             # Increment hit count
-            data["hit_count"] = data.get("hit_count", 0) + 1
+            stored = download.properties.metadata.get("hit_count")
+            hit_count = (int(stored) if stored else data.get("hit_count", 0)) + 1
             
-            # Update in background (don't await - fire and forget)
-            try:
-                await blob.upload_blob(
-                    json.dumps(data),
-                    overwrite=True,
-                )
-            except Exception as e:
-                logger.warning(f"Failed to update hit count for {key}: {e}")
+            self._schedule_hit(blob, key, hit_count)
             
-            logger.info(f"Cache hit: {key} (hits: {data['hit_count']})")
+            logger.info(f"Cache hit: {key} (hits: {hit_count})")
             
-            return CachedDocument(
+            cached = CachedDocument(
                 content=data["content"],
                 doc_type=data["doc_type"],
                 doc_id=data["doc_id"],
                 title=data.get("title", ""),
                 cached_at=data.get("cached_at", ""),
-                hit_count=data["hit_count"],
+                hit_count=hit_count,
                 indexed=data.get("indexed", False),
                 metadata=data.get("metadata", {}),
             )
+            self._mem[key] = cached
+            return cached
             
         except ResourceNotFoundError:
             logger.debug(f"Cache miss: {key}")
@@ -150,6 +166,20 @@ class DocumentCache:
             logger.error(f"Cache get error for {key}: {e}")
             return None
     
+    def _schedule_hit(self, blob, key: str, hit_count: int) -> None:
+        """Update the hit count in background (don't await - fire and forget)."""
+        task = asyncio.create_task(self._bump_hit(blob, key, hit_count))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+    
+    @staticmethod
+    async def _bump_hit(blob, key: str, hit_count: int) -> None:
+        """Record a hit as a metadata-only PUT; the content blob is untouched."""
+        try:
+            await blob.set_blob_metadata({"hit_count": str(hit_count)})
+        except Exception as e:
+            logger.warning(f"Failed to update hit count for {key}: {e}")
+    
     async def put(
         self,
         key: str,
@@ -178,9 +208,10 @@ class DocumentCache:
             "metadata": metadata or {},
         }
         
+        self._mem.pop(key, None)
         try:
             await blob.upload_blob(
-                json.dumps(data),
+                orjson.dumps(data),
                 overwrite=True,
             )
             logger.info(f"Cached document: {key}")
@@ -196,20 +227,47 @@ class DocumentCache:
         
         try:
             download = await blob.download_blob()
-            data = json.loads(await download.readall())
+            data = orjson.loads(await download.readall())
             data["indexed"] = True
             data["indexed_at"] = datetime.now(timezone.utc).isoformat()
             
             await blob.upload_blob(
-                json.dumps(data),
+                orjson.dumps(data),
                 overwrite=True,
+                metadata=download.properties.metadata,  # Keep the hit count
             )
+            cached = self._mem.get(key)
+            if cached is not None:
+                cached.indexed = True
             logger.info(f"Marked as indexed: {key}")
             return True
         except Exception as e:
             logger.error(f"Failed to mark indexed for {key}: {e}")
             return False
     
+    async def is_indexed(self, key: str) -> bool:
+        """
+        Check whether a cached document has been indexed.
+        
+        Answered from the in-process cache when possible. Returns False if
+        the document is missing or the lookup fails.
+        """
+        cached = self._mem.get(key)
+        if cached is not None:
+            return cached.indexed
+        
+        container = await self._get_container()
+        blob = container.get_blob_client(key)
+        try:
+            download = await blob.download_blob()
+            data = orjson.loads(await download.readall())
+            return data.get("indexed", False)
+        except ResourceNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Indexed check failed for {key}: {e}")
+            return False
+    
     async def exists(self, key: str) -> bool:
         """Check if document exists in cache."""
         container = await self._get_container()
@@ -4,26 +4,55 @@ In-memory conversation state.
 TODO: Replace with PostgreSQL for persistence.
 """
 
-from typing import Any
+from typing import Any, Iterable
+
+from cachetools import LRUCache
+
+from app.services.prompt import message_chars
+
+# Bounds on in-memory state: least recently used conversations are evicted
+MAX_CONVERSATIONS = 10_000
+MAX_MESSAGES_PER_CONVERSATION = 200  # Even, so trimming keeps user/assistant pairs
+
+
+class History(list):
+    """
+    Message list that keeps a running character count for token estimates.
+    
+    Stored histories are only ever appended to; trimming swaps in a new
+    History, so a turn holding the old list and its length sees a stable prefix.
+    """
+    
+    __slots__ = ("chars",)
+    
+    def __init__(self, messages: Iterable[dict[str, Any]] = (), chars: int = 0):
+        super().__init__(messages)
+        self.chars = chars
+
 
 # In-memory store: conversation_id -> list of messages
-_conversations: dict[str, list[dict[str, Any]]] = {}
+_conversations: LRUCache[str, History] = LRUCache(maxsize=MAX_CONVERSATIONS)
 
 
-def get_history(conversation_id: str) -> list[dict[str, Any]]:
+def get_history(conversation_id: str) -> History:
     """Get conversation history for a conversation ID."""
     if conversation_id not in _conversations:
-        _conversations[conversation_id] = []
+        _conversations[conversation_id] = History()
     return _conversations[conversation_id]
 
 
 def add_message(conversation_id: str, message: dict[str, Any]) -> None:
-    """Add a message to conversation history."""
-    if conversation_id not in _conversations:
-        _conversations[conversation_id] = []
-    _conversations[conversation_id].append(message)
+    """Add a message to conversation history, keeping only the most recent messages."""
+    history = get_history(conversation_id)
+    history.append(message)
+    history.chars += message_chars(message)
+    if len(history) > MAX_MESSAGES_PER_CONVERSATION:
+        # Copy-on-write: turns in flight keep the untrimmed list
+        excess = len(history) - MAX_MESSAGES_PER_CONVERSATION
+        dropped = sum(map(message_chars, history[:excess]))
+        _conversations[conversation_id] = History(history[excess:], history.chars - dropped)
 
 
 def clear_history(conversation_id: str) -> None:
     """Clear conversation history."""
-    _conversations[conversation_id] = []
+    _conversations[conversation_id] = History()
@@ -4,21 +4,36 @@ Feedback service for collecting user feedback with logs stored in Azure Blob Sto
 
 from __future__ import annotations
 
+import asyncio
+import gzip
 import logging
 import uuid
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Any
 
+import orjson
 from azure.data.tables.aio import TableServiceClient, TableClient
+from azure.storage.blob import BlobSasPermissions, ContentSettings, generate_blob_sas
 from azure.storage.blob.aio import BlobServiceClient, ContainerClient
 from azure.core.exceptions import ResourceExistsError
 
 from app.config import get_settings
+from app.services.pagination import list_entities_page
 
 logger = logging.getLogger(__name__)
 
 TABLE_NAME = "Feedback"
 BLOB_CONTAINER = "feedback-logs"
+LOGS_GZIP_LEVEL = 5  # Log bundles are repetitive text and compress many-fold
+LOGS_SAS_TTL = timedelta(hours=1)  # Lifetime of the read links handed to admins
+
+# Contact entity columns, their API record keys and stored length limits
+_CONTACT_FIELDS = (
+    ("ContactName", "name", 500),
+    ("ContactEmail", "email", 500),
+    ("ContactPhone", "phone", 100),
+    ("ContactCompany", "company", 500),
+)
 
 
 class FeedbackService:
@@ -30,46 +45,75 @@ class FeedbackService:
         self._blob_client: BlobServiceClient | None = None
         self._container: ContainerClient | None = None
         self._settings = get_settings()
+        # Serializes first-time client setup so concurrent first callers
+        # don't each create clients and race on create_table/create_container
+        self._init_lock = asyncio.Lock()
+    
+    async def ensure_ready(self) -> None:
+        """
+        Create the table and blob container clients ahead of the first request.
+        
+        Called at application startup; failures are logged and left to the
+        lazy path to retry.
+        """
+        if not self._settings.azure_blob_connection_string:
+            return
+        try:
+            await self._get_table()
+            await self._get_container()
+        except Exception as e:
+            logger.warning(f"Feedback storage warm-up failed: {e}")
     
     async def _get_table(self) -> TableClient:
         """Get or create the feedback table client."""
         if self._table is not None:
             return self._table
         
-        conn_str = self._settings.azure_blob_connection_string
-        self._table_client = TableServiceClient.from_connection_string(conn_str)
-        self._table = self._table_client.get_table_client(TABLE_NAME)
-        
-        # Idempotent table creation
-        try:
-            await self._table_client.create_table(TABLE_NAME)
-            logger.info(f"Created table: {TABLE_NAME}")
-        except ResourceExistsError:
-            pass  # Table already exists
-        except Exception as e:
-            logger.debug(f"Table creation note: {e}")
-        
-        return self._table
+        async with self._init_lock:
+            if self._table is not None:
+                return self._table
+            
+            conn_str = self._settings.azure_blob_connection_string
+            table_client = TableServiceClient.from_connection_string(conn_str)
+            
+            # Idempotent table creation
+            try:
+                await table_client.create_table(TABLE_NAME)
+                logger.info(f"Created table: {TABLE_NAME}")
+            except ResourceExistsError:
+                pass  # Table already exists
+            except Exception as e:
+                logger.debug(f"Table creation note: {e}")
+            
+            self._table_client = table_client
+            self._table = table_client.get_table_client(TABLE_NAME)
+            return self._table
     
     async def _get_container(self) -> ContainerClient:
         """Get or create the blob container for logs."""
         if self._container is not None:
             return self._container
         
-        conn_str = self._settings.azure_blob_connection_string
-        self._blob_client = BlobServiceClient.from_connection_string(conn_str)
-        self._container = self._blob_client.get_container_client(BLOB_CONTAINER)
-        
-        # Idempotent container creation
-        try:
-            await self._container.create_container()
-            logger.info(f"Created blob container: {BLOB_CONTAINER}")
-        except ResourceExistsError:
-            pass  # Container already exists
-        except Exception as e:
-            logger.debug(f"Container creation note: {e}")
-        
-        return self._container
+        async with self._init_lock:
+            if self._container is not None:
+                return self._container
+            
+            conn_str = self._settings.azure_blob_connection_string
+            blob_client = BlobServiceClient.from_connection_string(conn_str)
+            container = blob_client.get_container_client(BLOB_CONTAINER)
+            
+            # Idempotent container creation
+            try:
+                await container.create_container()
+                logger.info(f"Created blob container: {BLOB_CONTAINER}")
+            except ResourceExistsError:
+                pass  # Container already exists
+            except Exception as e:
+                logger.debug(f"Container creation note: {e}")
+            
+            self._blob_client = blob_client
+            self._container = container
+            return self._container
     
     async def submit_feedback(
         self,
@@ -92,14 +136,14 @@ class FeedbackService:
             contact: Optional contact info {name, email, phone, company}
         
         Returns:
-            Feedback ID (UUID)
+            Feedback ID (UUID hex, no dashes)
         """
-        feedback_id = str(uuid.uuid4())
+        feedback_id = uuid.uuid4().hex
         now = datetime.now(timezone.utc)
         date_str = now.strftime("%Y-%m-%d")
         
         # Upload logs to blob storage
-        logs_blob_url = await self._upload_logs(feedback_id, date_str, logs, user_agent)
+        logs_blob = await self._upload_logs(feedback_id, date_str, logs, user_agent)
         
         # Store feedback metadata in table
         table = await self._get_table()
@@ -110,21 +154,16 @@ class FeedbackService:
             "Type": feedback_type,
             "Message": message[:32000] if message else "",  # Azure Table max string size
             "Fingerprint": fingerprint,
-            "LogsBlobUrl": logs_blob_url,
+            "LogsBlob": logs_blob,  # Blob name; read links are minted when listing
             "UserAgent": user_agent[:1000] if user_agent else "",
             "CreatedAt": now.isoformat(),
         }
         
         # Add optional contact fields
         if contact:
-            if contact.get("name"):
-                entity["ContactName"] = contact["name"][:500]
-            if contact.get("email"):
-                entity["ContactEmail"] = contact["email"][:500]
-            if contact.get("phone"):
-                entity["ContactPhone"] = contact["phone"][:100]
-            if contact.get("company"):
-                entity["ContactCompany"] = contact["company"][:500]
+            for column, key, max_len in _CONTACT_FIELDS:
+                if value := contact.get(key):
+                    entity[column] = value[:max_len]
         
         await table.upsert_entity(entity)
         logger.info(f"Feedback submitted: {feedback_id} (type={feedback_type}, fingerprint={fingerprint[:8]}...)")
@@ -138,13 +177,12 @@ class FeedbackService:
         logs: list[dict[str, Any]],
         user_agent: str,
     ) -> str:
-        """Upload logs to blob storage and return the blob URL."""
+        """Upload logs to blob storage and return the blob name."""
         container = await self._get_container()
         
-        blob_name = f"{date_str}/{feedback_id}.json"
+        blob_name = f"{date_str}/{feedback_id}.json.gz"
         blob_client = container.get_blob_client(blob_name)
         
-        import json
         logs_data = {
             "feedbackId": feedback_id,
             "uploadedAt": datetime.now(timezone.utc).isoformat(),
@@ -153,13 +191,25 @@ class FeedbackService:
             "logs": logs,
         }
         
+        # Compact orjson, gzipped, off the event loop: log dumps can be large.
+        # Stored with Content-Encoding: gzip so browsers opening the URL inflate it.
         await blob_client.upload_blob(
-            json.dumps(logs_data, indent=2, default=str),
+            await asyncio.to_thread(self._encode_logs, logs_data),
             overwrite=True,
+            content_settings=ContentSettings(
+                content_type="application/json",
+                content_encoding="gzip",
+            ),
         )
         
         logger.info(f"Uploaded {len(logs)} log entries to blob: {blob_name}")
-        return blob_client.url
+        return blob_name
+    
+    @staticmethod
+    def _encode_logs(logs_data: dict[str, Any]) -> bytes:
+        """Serialize and gzip a log bundle (runs in a worker thread)."""
+        payload = orjson.dumps(logs_data, default=str, option=orjson.OPT_NON_STR_KEYS)
+        return gzip.compress(payload, LOGS_GZIP_LEVEL)
     
     async def close(self):
         """Clean up connections."""
@@ -172,45 +222,106 @@ class FeedbackService:
             self._blob_client = None
             self._container = None
     
-    async def list_all_feedback(self) -> list[dict]:
+    async def list_all_feedback(self, days: int | None = None) -> list[dict]:
         """
-        List all feedback records.
+        List all feedback records, or only those from the last `days` UTC days.
         Returns records sorted by date descending (newest first).
+        
+        With `days`, each day's partition (PartitionKey is the date) is queried
+        concurrently instead of scanning the whole table.
         """
         table = await self._get_table()
+        await self._get_container()  # Needed to sign log links
         
-        records = []
-        async for entity in table.list_entities():
-            contact = {}
-            if entity.get("ContactName"):
-                contact["name"] = entity.get("ContactName")
-            if entity.get("ContactEmail"):
-                contact["email"] = entity.get("ContactEmail")
-            if entity.get("ContactPhone"):
-                contact["phone"] = entity.get("ContactPhone")
-            if entity.get("ContactCompany"):
-                contact["company"] = entity.get("ContactCompany")
-            
-            records.append({
-                "id": entity.get("RowKey", ""),
-                "date": entity.get("PartitionKey", ""),
-                "type": entity.get("Type", ""),
-                "message": entity.get("Message", ""),
-                "fingerprint": entity.get("Fingerprint", ""),
-                "logs_url": entity.get("LogsBlobUrl", ""),
-                "user_agent": entity.get("UserAgent", ""),
-                "created_at": entity.get("CreatedAt"),
-                "contact": contact if contact else None,
-            })
-        
-        # Sort by created_at descending (newest first)
+        if days is None:
+            records = [self._to_record(entity) async for entity in table.list_entities()]
+        else:
+            today = datetime.now(timezone.utc).date()
+            partitions = [(today - timedelta(days=n)).isoformat() for n in range(days)]
+            per_day = await asyncio.gather(
+                *(self._list_partition(table, partition) for partition in partitions)
+            )
+            records = [record for day in per_day for record in day]
+        
+        self._sort_records(records)
+        return records
+    
+    async def _list_partition(self, table: TableClient, partition: str) -> list[dict]:
+        """List the feedback records stored under one date partition."""
+        entities = table.query_entities(
+            "PartitionKey eq @partition",
+            parameters={"partition": partition},
+        )
+        return [self._to_record(entity) async for entity in entities]
+    
+    async def list_feedback_page(
+        self,
+        limit: int = 200,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """
+        List one page of feedback records, in storage order (date ascending).
+        Records within the page are sorted newest first.
+        Returns (records, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for a malformed cursor.
+        """
+        table = await self._get_table()
+        await self._get_container()  # Needed to sign log links
+        entities, next_cursor = await list_entities_page(table, limit, cursor)
+        records = [self._to_record(entity) for entity in entities]
+        self._sort_records(records)
+        return records, next_cursor
+    
+    def _to_record(self, entity: dict) -> dict:
+        """Convert a feedback entity to an API record."""
+        contact = {key: entity[column] for column, key, _ in _CONTACT_FIELDS if entity.get(column)}
+        
+        return {
+            "id": entity.get("RowKey", ""),
+            "date": entity.get("PartitionKey", ""),
+            "type": entity.get("Type", ""),
+            "message": entity.get("Message", ""),
+            "fingerprint": entity.get("Fingerprint", ""),
+            "logs_url": self._logs_url(entity),
+            "user_agent": entity.get("UserAgent", ""),
+            "created_at": entity.get("CreatedAt"),
+            "contact": contact if contact else None,
+        }
+    
+    def _logs_url(self, entity: dict) -> str:
+        """
+        Link for an entity's log blob, signed with a short-lived read-only SAS.
+        
+        Rows written before blob names were stored keep their plain URL.
+        Expects _get_container() to have run.
+        """
+        blob_name = entity.get("LogsBlob")
+        if not blob_name:
+            return entity.get("LogsBlobUrl", "")
+        
+        url = f"{self._container.url}/{blob_name}"
+        credential = self._blob_client.credential
+        account_key = getattr(credential, "account_key", None)
+        if not account_key:
+            return url  # No shared key to sign with (e.g. a SAS connection string)
+        
+        sas = generate_blob_sas(
+            account_name=credential.account_name,
+            container_name=BLOB_CONTAINER,
+            blob_name=blob_name,
+            account_key=account_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=datetime.now(timezone.utc) + LOGS_SAS_TTL,
+        )
+        return f"{url}?{sas}"
+    
+    @staticmethod
+    def _sort_records(records: list[dict]) -> None:
+        """Sort by created_at descending (newest first)."""
         records.sort(
             key=lambda r: r["created_at"] or "", 
             reverse=True
         )
-        
-        return records
-
 
 # Singleton instance
 _service: FeedbackService | None = None
@@ -6,18 +6,54 @@ Rate limit: 45 requests/minute on free tier.
 
 from __future__ import annotations
 
+import asyncio
+import ipaddress
 import logging
+import re
+from functools import lru_cache
 from typing import Optional
 
 import httpx
+from cachetools import TTLCache
+
+from app.http_client import get_http_client
 
 logger = logging.getLogger(__name__)
 
 # ip-api.com free endpoint (HTTP only on free tier, but returns JSON)
 GEOIP_API_URL = "http://ip-api.com/json/{ip}?fields=status,country,city"
 
-# Simple in-memory cache to avoid repeated lookups
-_location_cache: dict[str, dict[str, str]] = {}
+# Successful lookups are kept for a day; failures for a few minutes so a
+# burst of unresolvable IPs doesn't burn through the rate limit
+_location_cache: TTLCache[str, dict[str, str]] = TTLCache(maxsize=10_000, ttl=86_400)
+_failed_lookups: TTLCache[str, bool] = TTLCache(maxsize=1_000, ttl=300)
+
+# Lookups in flight, so concurrent requests from one IP share a single API call
+_inflight: dict[str, asyncio.Task] = {}
+
+# "[v6]:port", "v4:port", or a bare address
+_IP_WITH_PORT = re.compile(r"\[([^\]]+)\](?::\d+)?$|([^:]+):\d+$|(.+)$")
+
+
+@lru_cache(maxsize=4096)
+def _normalize_ip(raw: str) -> str | None:
+    """
+    Strip any port from a client address and return the canonical IP.
+    
+    Returns None for unparseable addresses and for non-public ones
+    (loopback, private, link-local, ...), which have no geolocation.
+    """
+    match = _IP_WITH_PORT.match(raw.strip())
+    if match is None:
+        return None
+    candidate = match.group(1) or match.group(2) or match.group(3)
+    try:
+        addr = ipaddress.ip_address(candidate)
+    except ValueError:
+        return None
+    if not addr.is_global:
+        return None
+    return str(addr)
 
 
 async def get_location_from_ip(ip: str) -> dict[str, str]:
@@ -25,7 +61,7 @@ async def get_location_from_ip(ip: str) -> dict[str, str]:
     Get geographic location from IP address.
     
     Returns dict with 'country' and 'city' keys, or empty dict on failure.
-    Results are cached in memory.
+    Results (and, briefly, failures) are cached in memory.
     
     Args:
         ip: IP address to look up (IPv4 or IPv6), may include port
@@ -33,49 +69,66 @@ async def get_location_from_ip(ip: str) -> dict[str, str]:
     Returns:
         {"country": "United States", "city": "New York"} or {}
     """
-    if not ip or ip in ("127.0.0.1", "localhost", "::1"):
+    if not ip:
         return {}
     
-    # Strip port if present (e.g., "192.168.1.1:12345" -> "192.168.1.1")
-    ip_only = ip.split(":")[0] if ":" in ip and not ip.startswith("[") else ip
-    # Handle IPv6 with port: [::1]:8080 -> ::1
-    if ip.startswith("[") and "]:" in ip:
-        ip_only = ip[1:ip.index("]")]
+    # Strip port and skip local/private addresses (e.g., "[::1]:8080", "10.0.0.5:443")
+    ip_only = _normalize_ip(ip)
+    if ip_only is None:
+        return {}
     
     # Check cache first
     if ip_only in _location_cache:
         return _location_cache[ip_only]
+    if ip_only in _failed_lookups:
+        return {}
     
+    # Join a lookup already in flight for this IP
+    task = _inflight.get(ip_only)
+    if task is None:
+        task = asyncio.create_task(_lookup(ip_only))
+        _inflight[ip_only] = task
+        task.add_done_callback(lambda _: _inflight.pop(ip_only, None))
+    # Shielded so one cancelled caller doesn't cancel the lookup for the others
+    return await asyncio.shield(task)
+
+
+async def _lookup(ip_only: str) -> dict[str, str]:
+    """Query ip-api.com for a normalized IP and cache the outcome."""
     try:
-        async with httpx.AsyncClient(timeout=5.0) as client:
-            response = await client.get(GEOIP_API_URL.format(ip=ip_only))
-            
-            if response.status_code != 200:
-                logger.warning(f"Geolocation API returned {response.status_code} for IP {ip}")
-                return {}
-            
-            data = response.json()
-            
-            if data.get("status") != "success":
-                logger.debug(f"Geolocation lookup failed for IP {ip_only}: {data}")
-                return {}
-            
-            result = {
-                "country": data.get("country", ""),
-                "city": data.get("city", ""),
-            }
-            
-            # Cache the result using cleaned IP
-            _location_cache[ip_only] = result
-            logger.debug(f"Geolocation for {ip_only}: {result}")
-            
-            return result
-            
+        client = get_http_client()
+        response = await client.get(GEOIP_API_URL.format(ip=ip_only), timeout=5.0)
+        
+        if response.status_code != 200:
+            logger.warning(f"Geolocation API returned {response.status_code} for IP {ip_only}")
+            _failed_lookups[ip_only] = True
+            return {}
+        
+        data = response.json()
+        
+        if data.get("status") != "success":
+            logger.debug(f"Geolocation lookup failed for IP {ip_only}: {data}")
+            _failed_lookups[ip_only] = True
+            return {}
+        
+        result = {
+            "country": data.get("country", ""),
+            "city": data.get("city", ""),
+        }
+        
+        # Cache the result using cleaned IP
+        _location_cache[ip_only] = result
+        logger.debug(f"Geolocation for {ip_only}: {result}")
+        
+        return result
+        
     except httpx.TimeoutException:
         logger.warning(f"Geolocation timeout for IP {ip_only}")
+        _failed_lookups[ip_only] = True
         return {}
     except Exception as e:
         logger.warning(f"Geolocation error for IP {ip_only}: {e}")
+        _failed_lookups[ip_only] = True
         return {}
 
 
@@ -10,11 +10,16 @@ from __future__ import annotations
 import asyncio
 import hashlib
 import logging
+import random
+from functools import lru_cache
 from typing import Any, List, Optional
 
 import httpx
+import orjson
+from cachetools import LRUCache
 
 from app.config import get_settings
+from app.http_client import get_http_client
 from app.services.cache import get_cache
 
 logger = logging.getLogger(__name__)
@@ -22,6 +27,106 @@ logger = logging.getLogger(__name__)
 # Cohere embed-v3-english produces 1024-dimensional vectors
 EMBEDDING_DIMENSIONS = 1024
 
+# Max embedding batches in flight at once per generate_embeddings_batch call
+EMBEDDING_BATCH_CONCURRENCY = 8
+
+# Documents per Azure Search docs/index call (the service accepts up to 1000)
+INDEX_UPLOAD_BATCH_SIZE = 100
+
+# Shorter (stripped) content is placeholder text, not worth an embedding call
+MIN_INDEXABLE_LEN = 50
+
+# Cache keys being indexed right now, so overlapping cache hits don't embed twice
+_indexing: set[str] = set()
+
+# Transient failures (rate limits, gateway errors, dropped connections) are retried
+# with jittered exponential backoff, honoring Retry-After when the service sends it
+MAX_RETRIES = 4
+BASE_RETRY_DELAY = 1.0  # seconds
+MAX_RETRY_DELAY = 30.0  # seconds
+RETRYABLE_STATUS = frozenset({429, 502, 503, 504})
+
+
+async def _post_with_retry(
+    url: str,
+    *,
+    timeout: float,
+    headers: dict[str, str],
+    content: bytes,
+) -> httpx.Response:
+    """
+    POST on the pooled client, retrying transient failures.
+    
+    Non-retryable statuses raise httpx.HTTPStatusError straight away, as
+    raise_for_status() would; the last attempt raises whatever it hits.
+    """
+    client = get_http_client()
+    for attempt in range(MAX_RETRIES):
+        retry_after = None
+        try:
+            response = await client.post(url, timeout=timeout, headers=headers, content=content)
+        except httpx.TransportError as e:
+            logger.debug(f"Transport error from {url}: {e}")
+        else:
+            if response.status_code not in RETRYABLE_STATUS:
+                response.raise_for_status()
+                return response
+            retry_after = response.headers.get("Retry-After")
+        
+        if retry_after is not None and retry_after.isdigit():
+            delay = min(float(retry_after), MAX_RETRY_DELAY)
+        else:
+            delay = min(BASE_RETRY_DELAY * (2 ** attempt), MAX_RETRY_DELAY) + random.random()
+        logger.warning(f"Transient error from {url}, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+        await asyncio.sleep(delay)
+    
+    # Final attempt: whatever happens now is raised to the caller
+    response = await client.post(url, timeout=timeout, headers=headers, content=content)
+    response.raise_for_status()
+    return response
+
+
+@lru_cache(maxsize=1)
+def _embedding_target() -> tuple[str, dict[str, str], str] | None:
+    """Embedding URL, request headers and model, built once from settings (None if unconfigured)."""
+    settings = get_settings()
+    if not settings.azure_ai_services_endpoint or not settings.azure_ai_services_key:
+        return None
+    endpoint = settings.azure_ai_services_endpoint.rstrip('/')
+    url = f"{endpoint}/models/embeddings?api-version=2024-05-01-preview"
+    headers = {
+        "Authorization": f"Bearer {settings.azure_ai_services_key}",
+        "Content-Type": "application/json",
+        "extra-parameters": "pass-through",
+    }
+    return url, headers, settings.azure_ai_services_embedding_deployment
+
+
+@lru_cache(maxsize=1)
+def _search_target() -> tuple[str, dict[str, str], str] | None:
+    """Search endpoint, request headers and default index, built once from settings (None if unconfigured)."""
+    settings = get_settings()
+    if not settings.azure_search_endpoint or not settings.azure_search_key:
+        return None
+    headers = {
+        "Content-Type": "application/json",
+        "api-key": settings.azure_search_key,
+    }
+    return settings.azure_search_endpoint, headers, settings.azure_search_index
+
+
+# Embeddings for recently seen texts, keyed by content hash. A 1024-float vector
+# is ~33KB as a Python list, so this holds ~70MB at most.
+EMBEDDING_CACHE_SIZE = 2048
+_embedding_cache: LRUCache[bytes, List[float]] = LRUCache(maxsize=EMBEDDING_CACHE_SIZE)
+
+
+def _embedding_key(model: str, input_type: str, text: str) -> bytes:
+    """Content-hash cache key for an embedding."""
+    return hashlib.blake2b(
+        f"{model}\0{input_type}\0{text}".encode(), digest_size=16
+    ).digest()
+
 
 async def generate_embedding(
     text: str,
@@ -49,7 +154,10 @@ async def generate_embeddings_batch(
     """
     Generate embeddings for multiple texts in batches.
     
-    Much faster than sequential calls - batches up to 20 texts per API call.
+    Much faster than sequential calls - batches up to 20 texts per API call,
+    with up to EMBEDDING_BATCH_CONCURRENCY batches in flight at once. Texts
+    already embedded recently (or repeated within the call) are served from
+    an in-process cache and sent to the API only once.
     
     Args:
         texts: List of texts to embed
@@ -57,51 +165,77 @@ async def generate_embeddings_batch(
         batch_size: Max texts per API call (Cohere limit is ~96, using 20 for safety)
     
     Returns:
-        List of embedding vectors (or None for failed texts)
+        List of embedding vectors (or None for failed or blank texts)
     """
-    settings = get_settings()
+    if not texts:
+        return []
     
-    if not settings.azure_ai_services_endpoint or not settings.azure_ai_services_key:
+    target = _embedding_target()
+    if target is None:
         logger.warning("Azure AI Services not configured, skipping embeddings")
         return [None] * len(texts)
-    
-    endpoint = settings.azure_ai_services_endpoint.rstrip('/')
-    url = f"{endpoint}/models/embeddings?api-version=2024-05-01-preview"
-    
-    results: List[Optional[List[float]]] = []
-    
-    # Process in batches
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            truncated_batch = [t[:8000] for t in batch]  # Truncate each text
-            
+    url, headers, model = target
+    
+    # Serve repeats from the content-hash cache; only unique misses hit the API
+    results: List[Optional[List[float]]] = [None] * len(texts)
+    pending: dict[bytes, list[int]] = {}
+    for i, text in enumerate(texts):
+        if not text or text.isspace():
+            continue  # Nothing to embed; leave None rather than spend an API slot
+        key = _embedding_key(model, input_type, text[:8000])
+        cached = _embedding_cache.get(key)
+        if cached is not None:
+            results[i] = cached
+        else:
+            pending.setdefault(key, []).append(i)
+    
+    if not pending:
+        return results
+    
+    keys = list(pending)
+    miss_texts = [texts[pending[key][0]][:8000] for key in keys]  # Truncate each text
+    semaphore = asyncio.Semaphore(EMBEDDING_BATCH_CONCURRENCY)
+    
+    async def embed_batch(start: int) -> List[Optional[List[float]]]:
+        truncated_batch = miss_texts[start:start + batch_size]
+        
+        async with semaphore:
             try:
-                response = await client.post(
+                response = await _post_with_retry(
                     url,
-                    headers={
-                        "Authorization": f"Bearer {settings.azure_ai_services_key}",
-                        "Content-Type": "application/json",
-                        "extra-parameters": "pass-through",
-                    },
-                    json={
+                    timeout=60.0,
+                    headers=headers,
+                    content=orjson.dumps({
                         "input": truncated_batch,
-                        "model": settings.azure_ai_services_embedding_deployment,
+                        "model": model,
                         "input_type": input_type,
-                    },
+                    }),
                 )
-                response.raise_for_status()
-                data = response.json()
+                # Embedding responses are mostly floats - orjson parses them far faster
+                data = orjson.loads(response.content)
                 
-                # Extract embeddings in order
+                # Place each embedding by its index; the response order isn't guaranteed
+                batch_out: List[Optional[List[float]]] = [None] * len(truncated_batch)
                 for item in data["data"]:
-                    results.append(item["embedding"])
-                    
+                    batch_out[item["index"]] = item["embedding"]
+                return batch_out
+                
             except Exception as e:
-                logger.error(f"Batch embedding error for batch {i//batch_size + 1}: {e}")
+                logger.error(f"Batch embedding error for batch {start//batch_size + 1}: {e}")
                 # Return None for this batch
-                results.extend([None] * len(batch))
-    
+                return [None] * len(truncated_batch)
+    
+    # Batches run concurrently; gather() keeps them in input order
+    batches = await asyncio.gather(
+        *(embed_batch(start) for start in range(0, len(miss_texts), batch_size))
+    )
+    
+    embedded = [embedding for batch_results in batches for embedding in batch_results]
+    for key, embedding in zip(keys, embedded):
+        if embedding is not None:
+            _embedding_cache[key] = embedding
+        for i in pending[key]:
+            results[i] = embedding
     return results
 
 
@@ -116,39 +250,61 @@ async def upload_to_index(doc: dict[str, Any], index_name: str | None = None) ->
     Returns:
         True if successful.
     """
-    settings = get_settings()
-    endpoint = settings.azure_search_endpoint
-    index = index_name or settings.azure_search_index
-    api_key = settings.azure_search_key
+    results = await upload_batch_to_index([doc], index_name=index_name)
+    return results[0]
+
+
+async def upload_batch_to_index(
+    docs: list[dict[str, Any]],
+    index_name: str | None = None,
+) -> list[bool]:
+    """
+    Upload documents to Azure AI Search in batched index calls.
+    
+    Documents are sent INDEX_UPLOAD_BATCH_SIZE per request and the per-document
+    status array in each response decides success.
+    
+    Args:
+        docs: Documents with id, title, content, etc.
+        index_name: Optional index name override. Defaults to settings.azure_search_index.
     
-    if not endpoint or not api_key:
+    Returns:
+        One success flag per document, in input order.
+    """
+    target = _search_target()
+    if target is None:
         logger.error("Azure Search not configured")
-        return False
+        return [False] * len(docs)
+    endpoint, headers, default_index = target
     
-    url = f"{endpoint}/indexes/{index}/docs/index?api-version=2024-07-01"
+    url = f"{endpoint}/indexes/{index_name or default_index}/docs/index?api-version=2024-07-01"
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
+    results: list[bool] = []
+    for start in range(0, len(docs), INDEX_UPLOAD_BATCH_SIZE):
+        batch = docs[start:start + INDEX_UPLOAD_BATCH_SIZE]
         try:
-            response = await client.post(
+            response = await _post_with_retry(
                 url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": api_key,
-                },
-                json={
-                    "value": [
-                        {
-                            "@search.action": "upload",
-                            **doc,
-                        }
-                    ]
-                },
+                timeout=30.0,
+                headers=headers,
+                content=orjson.dumps({
+                    "value": [{"@search.action": "upload", **doc} for doc in batch]
+                }),
             )
-            response.raise_for_status()
-            return True
         except Exception as e:
-            logger.error(f"Index upload error for {doc.get('id')}: {e}")
-            return False
+            logger.error(f"Index upload error for {len(batch)} docs starting at {batch[0].get('id')}: {e}")
+            results.extend([False] * len(batch))
+            continue
+        
+        # 200 means every document succeeded; 207 carries per-document failures
+        status = {item["key"]: item["status"] for item in response.json().get("value", [])}
+        for doc in batch:
+            ok = status.get(doc.get("id"), False)
+            if not ok:
+                logger.error(f"Index upload rejected {doc.get('id')}")
+            results.append(ok)
+    
+    return results
 
 
 async def index_document(
@@ -164,9 +320,11 @@ async def index_document(
     Index a document in Azure AI Search.
     
     This function:
-    1. Generates embedding for the content
-    2. Uploads to the search index
-    3. Marks the cached document as indexed (if cache_key provided)
+    1. Skips placeholder-length content and documents the cache already has
+       marked as indexed (or that are being indexed right now)
+    2. Generates embedding for the content
+    3. Uploads to the search index
+    4. Marks the cached document as indexed (if cache_key provided)
     
     Args:
         content: Document text content
@@ -177,7 +335,7 @@ async def index_document(
         cache_key: Cache key to mark as indexed after success
     
     Returns:
-        True if indexing succeeded.
+        True if indexing succeeded or the document was already indexed.
     """
     settings = get_settings()
     
@@ -186,6 +344,40 @@ async def index_document(
         logger.debug("Auto-indexing disabled, skipping")
         return False
     
+    if len(content.strip()) < MIN_INDEXABLE_LEN:
+        logger.debug(f"Content too short to index, skipping: {doc_type}/{doc_id}")
+        return False
+    
+    if cache_key:
+        if cache_key in _indexing:
+            logger.debug(f"Already indexing, skipping: {doc_type}/{doc_id}")
+            return False
+        _indexing.add(cache_key)
+        try:
+            if await get_cache().is_indexed(cache_key):
+                logger.debug(f"Already indexed, skipping: {doc_type}/{doc_id}")
+                return True
+            return await _embed_and_upload(
+                content, doc_type, doc_id, title, source_url, cache_key, index_name
+            )
+        finally:
+            _indexing.discard(cache_key)
+    
+    return await _embed_and_upload(
+        content, doc_type, doc_id, title, source_url, cache_key, index_name
+    )
+
+
+async def _embed_and_upload(
+    content: str,
+    doc_type: str,
+    doc_id: str,
+    title: str,
+    source_url: str,
+    cache_key: str | None,
+    index_name: str | None,
+) -> bool:
+    """Embed a document, upload it to the index and mark its cache entry indexed."""
     logger.info(f"Indexing document: {doc_type}/{doc_id}")
     
     # Generate unique ID
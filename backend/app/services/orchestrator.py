@@ -9,21 +9,159 @@ executes tools, and streams responses back. Supports multiple LLM providers
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import inspect
 import logging
-from typing import AsyncIterator, Any, Optional
+import random
+from dataclasses import dataclass
+from typing import AsyncIterator, Any, Iterator, Optional
 
 import litellm
+import orjson
 
 from app.config import get_settings
+from app.services import semantic_cache
 from app.services.conversation import get_history, add_message
+from app.services.prompt import PromptAssembler
 from app.agents import AgentConfig
 
 logger = logging.getLogger(__name__)
 
-# Retry configuration for transient API errors
+# Retry configuration for transient API errors: exponential backoff with
+# +/-50% jitter so concurrently throttled turns don't retry in lockstep
 MAX_RETRIES = 3
-BASE_RETRY_DELAY = 2.0  # seconds
+BASE_RETRY_DELAY = 1.0  # seconds
+MAX_RETRY_DELAY = 30.0  # seconds
+RETRY_JITTER = 0.5
+
+# litellm (OpenAI-style) finish_reason -> Anthropic stop_reason
+_STOP_REASONS = {"stop": "end_turn", "tool_calls": "tool_use", "length": "max_tokens"}
+
+
+@dataclass(slots=True)
+class FinalMessage:
+    """A streamed reply, assembled into Anthropic-style content blocks."""
+    content: list[dict[str, Any]]
+    stop_reason: Optional[str]
+    output_tokens: Optional[int]
+
+
+def _final_message(chunks: list[Any]) -> FinalMessage:
+    """
+    Assemble streamed chunks into the final message with litellm.stream_chunk_builder.
+    
+    Thinking blocks come first (Anthropic requires them to be sent back with
+    tool use), then the text, then one tool_use block per tool call.
+    """
+    built = litellm.stream_chunk_builder(chunks) if chunks else None
+    if built is None or not built.choices:
+        return FinalMessage([], None, None)
+    
+    choice = built.choices[0]
+    message = choice.message
+    content: list[dict[str, Any]] = [dict(block) for block in getattr(message, "thinking_blocks", None) or []]
+    if message.content:
+        content.append({"type": "text", "text": message.content})
+    for call in message.tool_calls or []:
+        try:
+            arguments = orjson.loads(call.function.arguments or "{}")
+        except orjson.JSONDecodeError:
+            logger.warning(f"Unparseable arguments for tool call {call.function.name}")
+            arguments = {}
+        content.append({"type": "tool_use", "id": call.id, "name": call.function.name, "input": arguments})
+    
+    usage = getattr(built, "usage", None)
+    return FinalMessage(
+        content=content,
+        stop_reason=_STOP_REASONS.get(choice.finish_reason, choice.finish_reason),
+        output_tokens=getattr(usage, "completion_tokens", None),
+    )
+
+
+def _retry_delay(attempt: int, error: Exception) -> float:
+    """Seconds to wait before retrying: the server's Retry-After if given, else jittered backoff."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    retry_after = headers.get("retry-after") if headers else None
+    if retry_after is not None and retry_after.isdigit():
+        return min(float(retry_after), MAX_RETRY_DELAY)
+    delay = min(MAX_RETRY_DELAY, BASE_RETRY_DELAY * (2 ** attempt))
+    return delay * (1 + random.uniform(-RETRY_JITTER, RETRY_JITTER))
+
+
+# Tool calls from one LLM response that may run at once
+MAX_PARALLEL_TOOLS = 4
+
+# Tool results at least this long are sent once per turn; repeats become references
+MIN_REF_RESULT_LEN = 200
+
+# Tools with side effects: never served from the tool-result cache, and running
+# one clears it (e.g. a delete makes an earlier document listing stale)
+MUTATING_TOOLS = frozenset({"delete_my_document"})
+
+
+# Events buffered between a sync stream's reader thread and the event loop
+STREAM_QUEUE_SIZE = 32
+_STREAM_END = object()
+
+
+def _async_events(stream: Any) -> AsyncIterator[Any]:
+    """
+    Iterate an LLM stream without blocking the event loop.
+    
+    Async streams are returned as-is. A sync stream (some litellm providers
+    hand one back) is read by a single worker thread into a bounded queue,
+    instead of blocking the loop or dispatching a thread per chunk.
+    """
+    if hasattr(stream, "__aiter__"):
+        return stream
+    return _iterate_in_thread(stream)
+
+
+async def _iterate_in_thread(stream: Iterator[Any]) -> AsyncIterator[Any]:
+    """Yield a sync iterator's items from one reader thread, re-raising its error."""
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=STREAM_QUEUE_SIZE)
+    stopped = False
+    
+    def put(item: Any) -> None:
+        # Blocks the reader thread while the queue is full
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+    
+    def read() -> None:
+        try:
+            for event in stream:
+                if stopped:
+                    return
+                put(event)
+        except Exception as e:
+            put(e)
+        else:
+            put(_STREAM_END)
+    
+    reader = loop.run_in_executor(None, read)
+    try:
+        while (item := await queue.get()) is not _STREAM_END:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await reader
+    finally:
+        stopped = True
+        # Unblock a reader waiting on a full queue so the thread can exit
+        while not queue.empty():
+            queue.get_nowait()
+
+
+def _tool_cache_key(name: str, input_data: dict[str, Any]) -> str:
+    """Memoization key for a tool call: name plus canonicalized input."""
+    payload = {k: v for k, v in input_data.items() if k != "personal_doc_cache"}
+    canonical = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS, default=str)
+    return hashlib.blake2b(name.encode() + b"|" + canonical, digest_size=16).hexdigest()
+
+
+def _result_id(result: str) -> str:
+    """Short content id for a tool result."""
+    return hashlib.blake2b(result.encode(), digest_size=8).hexdigest()
 
 
 async def execute_tool_with_config(
@@ -32,6 +170,7 @@ async def execute_tool_with_config(
     agent_config: AgentConfig,
     fingerprint: Optional[str] = None,
     personal_doc_cache: Optional[dict[str, str]] = None,
+    tool_result_cache: Optional[dict[str, str]] = None,
 ) -> str:
     """
     Execute a tool by name using the agent's tool implementations.
@@ -40,6 +179,10 @@ async def execute_tool_with_config(
     - agent's search_index into tools that accept 'index_name' parameter
     - user's fingerprint into tools that accept 'fingerprint' parameter
     - personal_doc_cache into tools that accept it (for document grounding)
+    
+    With tool_result_cache, a repeat of an earlier successful call (same tool,
+    same input after injection) returns the earlier result without running
+    the tool again.
     """
     if name not in agent_config.tool_implementations:
         logger.warning(f"Unknown tool for agent {agent_config.name}: {name}")
@@ -47,28 +190,43 @@ async def execute_tool_with_config(
     
     try:
         tool_func = agent_config.tool_implementations[name]
-        sig = inspect.signature(tool_func)
+        params = agent_config.tool_param_sets.get(name)
+        if params is None:
+            params = frozenset(inspect.signature(tool_func).parameters)
         
         # Auto-inject agent's search index if tool accepts index_name parameter
-        if "index_name" in sig.parameters and "index_name" not in input_data:
+        if "index_name" in params and "index_name" not in input_data:
             input_data["index_name"] = agent_config.search_index
             logger.debug(f"Injected index_name={agent_config.search_index} into {name}")
         
         # Auto-inject user's fingerprint if tool accepts fingerprint parameter
-        if "fingerprint" in sig.parameters and "fingerprint" not in input_data and fingerprint:
+        if "fingerprint" in params and "fingerprint" not in input_data and fingerprint:
             input_data["fingerprint"] = fingerprint
             logger.debug(f"Injected fingerprint into {name}")
         
         # Auto-inject personal document cache if tool accepts it
-        if "personal_doc_cache" in sig.parameters and personal_doc_cache is not None:
+        if "personal_doc_cache" in params and personal_doc_cache is not None:
             input_data["personal_doc_cache"] = personal_doc_cache
             logger.debug(f"Injected personal_doc_cache into {name}")
         
+        cache_key = None
+        if tool_result_cache is not None:
+            if name in MUTATING_TOOLS:
+                tool_result_cache.clear()
+            else:
+                cache_key = _tool_cache_key(name, input_data)
+                cached = tool_result_cache.get(cache_key)
+                if cached is not None:
+                    logger.info(f"Tool result cache hit: {name}")
+                    return cached
+        
         result = await tool_func(**input_data)
         # Ensure non-empty result (Claude API requires non-empty text content blocks)
         result_str = str(result) if result else ""
         if not result_str.strip():
             result_str = f"Tool {name} completed but returned no content."
+        if cache_key is not None:
+            tool_result_cache[cache_key] = result_str
         return result_str
     except Exception as e:
         logger.error(f"Tool {name} failed: {e}")
@@ -115,29 +273,47 @@ async def handle_conversation(
     # Configure litellm for logging and debugging
     litellm.set_verbose = False  # Set to True for debugging
     
+    model_is_claude = "claude" in model_id.lower()
+    
     # Conversation-scoped cache for personal document content (for grounding)
     personal_doc_cache: dict[str, str] = {}
     
-    # Load conversation history and add user message
-    messages = get_history(conversation_id).copy()
-    messages.append({"role": "user", "content": user_message})
+    # Conversation-scoped memo of tool results, keyed by tool name + input
+    tool_result_cache: dict[str, str] = {}
     
-    # Estimate token count and warn if approaching limit
-    # Rough approximation: ~4 chars per token (conservative estimate)
-    def estimate_tokens(msgs: list, system: str) -> int:
-        total_chars = len(system)
-        for msg in msgs:
-            content = msg.get("content", "")
-            if isinstance(content, str):
-                total_chars += len(content)
-            elif isinstance(content, list):
-                for block in content:
-                    if isinstance(block, dict):
-                        # Tool results can be nested
-                        total_chars += len(str(block))
-        return total_chars // 4
+    # Content ids of tool results already sent this turn -> first tool_use_id
+    sent_results: dict[str, str] = {}
+    
+    # Load conversation history and add user message. History stays a stable
+    # prefix; this turn's messages only ever go after it (prompt-cache friendly).
+    history = get_history(conversation_id)
+    assembler = PromptAssembler(
+        agent_config.system_prompt,
+        history,
+        user_message,
+        cache_control=model_is_claude,
+    )
+    
+    # Semantic cache: answer a near-duplicate of an earlier conversation without the LLM
+    cache_scope = (agent_config.name, fingerprint or "")
+    cache_vector = None
+    if settings.semantic_cache_enabled:
+        user_texts = [
+            msg["content"] for msg in history
+            if msg.get("role") == "user" and isinstance(msg.get("content"), str)
+        ]
+        user_texts.append(user_message)
+        cache_vector = await semantic_cache.conversation_embedding(user_texts)
+        cached_answer = semantic_cache.lookup(cache_scope, cache_vector) if cache_vector else None
+        if cached_answer is not None:
+            logger.info(f"[agent={agent_config.name}] Semantic cache hit for conversation {conversation_id}")
+            yield {"type": "text", "content": cached_answer}
+            add_message(conversation_id, {"role": "user", "content": user_message})
+            add_message(conversation_id, {"role": "assistant", "content": cached_answer})
+            return
     
-    estimated_tokens = estimate_tokens(messages, agent_config.system_prompt)
+    # Estimate token count and warn if approaching limit
+    estimated_tokens = assembler.estimated_tokens()
     TOKEN_WARNING_THRESHOLD = 150000
     TOKEN_LIMIT = 200000
     
@@ -158,7 +334,7 @@ async def handle_conversation(
     iteration = 0
     while True:
         iteration += 1
-        logger.info(f"[iter={iteration}] Calling LLM with {len(messages)} messages")
+        logger.info(f"[iter={iteration}] Calling LLM with {len(assembler)} messages")
         
         # Retry loop for transient API errors
         last_error = None
@@ -172,8 +348,8 @@ async def handle_conversation(
                 api_params = {
                     "model": model_id,
                     "max_tokens": 16384,
-                    "system": agent_config.system_prompt,
-                    "messages": messages,
+                    "system": assembler.system(),
+                    "messages": assembler.build(),
                     "stream": True,
                 }
                 
@@ -182,7 +358,7 @@ async def handle_conversation(
                     api_params["tools"] = tool_definitions
                 
                 # Extended thinking only for Anthropic/Claude
-                if "claude" in model_id.lower():
+                if model_is_claude:
                     api_params["thinking"] = {
                         "type": "enabled",
                         "budget_tokens": 10000,
@@ -200,6 +376,14 @@ async def handle_conversation(
                 
                 thinking_chunks = []
                 
+                # Raw chunks, assembled into the final message after the stream
+                stream_chunks = []
+                
+                # Streamed tool input JSON, accumulated per content block index
+                # and parsed once when the block stops
+                tool_input_bufs: dict[int, bytearray] = {}
+                streamed_tool_inputs: dict[int, dict[str, Any]] = {}
+                
                 # Meta-commentary filter with streaming:
                 # Stream text normally for good UX, but track if we're in a text block.
                 # If tool_use starts right after text, send a "clear_text" event to
@@ -207,25 +391,26 @@ async def handle_conversation(
                 current_text_block_chars = 0  # Track chars in current text block
                 in_text_block = False
                 
-                async for event in stream_response:
-                    # litellm normalizes response format across providers
-                    if hasattr(event, 'choices') and event.choices:
-                        choice = event.choices[0]
-                        if hasattr(choice, 'delta'):
-                            delta = choice.delta
-                            
+                async for event in _async_events(stream_response):
+                    stream_chunks.append(event)
+                    # litellm normalizes response format across providers.
+                    # Attributes are fetched once per event with getattr.
+                    choices = getattr(event, "choices", None)
+                    if choices:
+                        choice = choices[0]
+                        delta = getattr(choice, "delta", None)
+                        if delta is not None:
                             # Handle content block start (from delta.type)
-                            if hasattr(delta, 'type'):
-                                block_type = delta.type
-                                if block_type == "thinking_start":
+                            match getattr(delta, "type", None):
+                                case "thinking_start":
                                     logger.debug(f"[iter={iteration}] Thinking block starting")
                                     current_text_block_chars = 0
                                     in_text_block = False
-                                elif block_type == "text_start":
+                                case "text_start":
                                     logger.debug(f"[iter={iteration}] Text block starting")
                                     current_text_block_chars = 0
                                     in_text_block = True
-                                elif block_type == "tool_use_start":
+                                case "tool_use_start":
                                     logger.info(f"[iter={iteration}] Tool use starting")
                                     # Tool use right after text = meta-commentary
                                     if current_text_block_chars > 0:
@@ -235,8 +420,8 @@ async def handle_conversation(
                                     in_text_block = False
                             
                             # Handle text content
-                            if hasattr(delta, 'text') and delta.text:
-                                text = delta.text
+                            text = getattr(delta, "text", None)
+                            if text:
                                 current_text_block_chars += len(text)
                                 text_chunks.append(text)
                                 yield {
@@ -245,68 +430,81 @@ async def handle_conversation(
                                 }
                             
                             # Handle thinking content (Anthropic only)
-                            if hasattr(delta, 'thinking') and delta.thinking:
-                                thinking_chunks.append(delta.thinking)
+                            thinking = getattr(delta, "thinking", None)
+                            if thinking:
+                                thinking_chunks.append(thinking)
                                 yield {
                                     "type": "thinking",
-                                    "content": delta.thinking,
+                                    "content": thinking,
                                 }
                             
                             # Handle tool use input (partial for streaming)
-                            if hasattr(delta, 'input') and delta.input:
+                            tool_input = getattr(delta, "input", None)
+                            if tool_input:
                                 # Tool input JSON being streamed
                                 yield {
                                     "type": "tool_input_chunk",
-                                    "content": delta.input,
+                                    "content": tool_input,
                                 }
                         
-                        elif event.type == "content_block_delta":
-                            if hasattr(event.delta, "type"):
-                                delta_type = event.delta.type
-                                logger.debug(f"[iter={iteration}] Delta type: {delta_type}")
-                                if delta_type == "thinking_delta":
-                                    # Extended Thinking: reasoning content
-                                    thinking_text = event.delta.thinking
-                                    thinking_chunks.append(thinking_text)
-                                    print(f"!!!THINKING!!! iter={iteration} len={len(thinking_text)}", flush=True)
-                                    logger.info(f"[iter={iteration}] Yielding thinking chunk: {len(thinking_text)} chars")
-                                    yield {"type": "thinking", "content": thinking_text}
-                                elif delta_type == "signature_delta":
-                                    # Signature for thinking block verification (required for preservation)
-                                    logger.debug(f"[iter={iteration}] Received thinking block signature")
-                                elif delta_type == "text_delta":
-                                    # Stream text immediately for good UX
-                                    chunk_count += 1
-                                    text = event.delta.text
-                                    text_chunks.append(text)
-                                    if in_text_block:
-                                        current_text_block_chars += len(text)
-                                    yield {"type": "text", "content": text}
-                                elif delta_type == "input_json_delta":
-                                    yield {"type": "tool_input", "partial": event.delta.partial_json}
-                        
-                        elif event.type == "content_block_stop":
-                            # Text block ended - reset counter but keep the value
-                            # (we need it if tool_use starts next)
-                            if not in_text_block:
-                                current_text_block_chars = 0
-                            in_text_block = False
-                        
-                        elif event.type == "message_stop":
-                            # Reset for next iteration
-                            current_text_block_chars = 0
-                            logger.info(f"[iter={iteration}] Message stopped")
-                        
-                    response = await stream.get_final_message()
-                    
-                    # Log thinking summary
-                    total_thinking = "".join(thinking_chunks)
-                    if total_thinking:
-                        logger.info(f"[iter={iteration}] Thinking: {len(total_thinking)} chars")
+                        else:
+                            match getattr(event, "type", None):
+                                case "content_block_delta":
+                                    block_delta = event.delta
+                                    delta_type = getattr(block_delta, "type", None)
+                                    if delta_type is not None:
+                                        logger.debug(f"[iter={iteration}] Delta type: {delta_type}")
+                                    match delta_type:
+                                        case "thinking_delta":
+                                            # Extended Thinking: reasoning content
+                                            thinking_text = block_delta.thinking
+                                            thinking_chunks.append(thinking_text)
+                                            logger.info(f"[iter={iteration}] Yielding thinking chunk: {len(thinking_text)} chars")
+                                            yield {"type": "thinking", "content": thinking_text}
+                                        case "signature_delta":
+                                            # Signature for thinking block verification (required for preservation)
+                                            logger.debug(f"[iter={iteration}] Received thinking block signature")
+                                        case "text_delta":
+                                            # Stream text immediately for good UX
+                                            chunk_count += 1
+                                            text = block_delta.text
+                                            text_chunks.append(text)
+                                            if in_text_block:
+                                                current_text_block_chars += len(text)
+                                            yield {"type": "text", "content": text}
+                                        case "input_json_delta":
+                                            partial = block_delta.partial_json
+                                            tool_input_bufs.setdefault(event.index, bytearray()).extend(partial.encode())
+                                            yield {"type": "tool_input", "partial": partial}
+                                
+                                case "content_block_stop":
+                                    buf = tool_input_bufs.pop(getattr(event, "index", None), None)
+                                    if buf:
+                                        try:
+                                            streamed_tool_inputs[event.index] = orjson.loads(buf)
+                                        except orjson.JSONDecodeError as e:
+                                            logger.warning(f"[iter={iteration}] Unparseable streamed tool input: {e}")
+                                    # Text block ended - reset counter but keep the value
+                                    # (we need it if tool_use starts next)
+                                    if not in_text_block:
+                                        current_text_block_chars = 0
+                                    in_text_block = False
+                                
+                                case "message_stop":
+                                    # Reset for next iteration
+                                    current_text_block_chars = 0
+                                    logger.info(f"[iter={iteration}] Message stopped")
+                
+                response = _final_message(stream_chunks)
+                
+                # Log thinking summary
+                total_thinking = "".join(thinking_chunks)
+                if total_thinking:
+                    logger.info(f"[iter={iteration}] Thinking: {len(total_thinking)} chars")
                 
                 # Log response details
                 total_text = "".join(text_chunks)
-                output_tokens = response.usage.output_tokens if hasattr(response, 'usage') else 'unknown'
+                output_tokens = response.output_tokens if response.output_tokens is not None else 'unknown'
                 logger.info(f"[iter={iteration}] Stream complete: {chunk_count} chunks, {len(total_text)} chars, output_tokens={output_tokens}, stop_reason={response.stop_reason}")
                 if response.stop_reason == "max_tokens":
                     logger.warning(f"[iter={iteration}] Response truncated due to max_tokens! output_tokens={output_tokens}")
@@ -317,19 +515,17 @@ async def handle_conversation(
                 
             except (litellm.RateLimitError, litellm.APIError) as e:
                 last_error = e
-                # Retry on rate limit errors
+                # Retry on rate limits, overload and server errors
                 status_code = getattr(e, 'status_code', None)
-                if isinstance(e, litellm.RateLimitError) and attempt < MAX_RETRIES - 1:
-                    delay = BASE_RETRY_DELAY * (2 ** attempt)
-                    logger.warning(f"LLM API rate limited, retrying in {delay}s (attempt {attempt + 1}/{MAX_RETRIES})")
-                    yield {"type": "text", "content": f"\n\n*API busy, retrying in {int(delay)}s...*\n\n"}
-                    await asyncio.sleep(delay)
-                    continue
-                elif status_code in (429, 529) and attempt < MAX_RETRIES - 1:
-                    # Handle other rate limit/overload statuses
-                    delay = BASE_RETRY_DELAY * (2 ** attempt)
-                    logger.warning(f"LLM API overloaded (status {status_code}), retrying in {delay}s (attempt {attempt + 1}/{MAX_RETRIES})")
-                    yield {"type": "text", "content": f"\n\n*API busy, retrying in {int(delay)}s...*\n\n"}
+                retryable = (
+                    isinstance(e, litellm.RateLimitError)
+                    or status_code in (429, 529)
+                    or (isinstance(status_code, int) and status_code >= 500)
+                )
+                if retryable and attempt < MAX_RETRIES - 1:
+                    delay = _retry_delay(attempt, e)
+                    logger.warning(f"LLM API busy (status {status_code}), retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES})")
+                    yield {"type": "text", "content": f"\n\n*API busy, retrying in {delay:.1f}s...*\n\n"}
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -342,9 +538,9 @@ async def handle_conversation(
                 last_error = e
                 # Retry on connection errors (e.g., Ollama server down)
                 if attempt < MAX_RETRIES - 1:
-                    delay = BASE_RETRY_DELAY * (2 ** attempt)
-                    logger.warning(f"LLM API connection error, retrying in {delay}s (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
-                    yield {"type": "text", "content": f"\n\n*Connection error, retrying in {int(delay)}s...*\n\n"}
+                    delay = _retry_delay(attempt, e)
+                    logger.warning(f"LLM API connection error, retrying in {delay:.1f}s (attempt {attempt + 1}/{MAX_RETRIES}): {e}")
+                    yield {"type": "text", "content": f"\n\n*Connection error, retrying in {delay:.1f}s...*\n\n"}
                     await asyncio.sleep(delay)
                     continue
                 else:
@@ -359,35 +555,66 @@ async def handle_conversation(
             return
         
         # Check for tool calls
-        tool_uses = [block for block in response.content if block.type == "tool_use"]
+        tool_uses = []
+        for index, block in enumerate(response.content):
+            if block["type"] != "tool_use":
+                continue
+            if not block["input"] and index in streamed_tool_inputs:
+                block["input"] = streamed_tool_inputs[index]
+            tool_uses.append(block)
         
         if not tool_uses:
             # No tools called, we're done
             break
         
-        # Add assistant message to history
-        messages.append({"role": "assistant", "content": response.content})
+        # Add assistant message to this turn
+        assembler.append({"role": "assistant", "content": response.content})
         
-        # Execute tools and collect results
-        tool_results = []
+        # Execute tools concurrently (bounded); a batch containing a mutating
+        # tool runs one at a time so calls keep the order Claude gave them
         for tool_use in tool_uses:
-            logger.info(f"Executing tool: {tool_use.name}")
-            yield {"type": "tool_executing", "tool": tool_use.name, "input": tool_use.input}
-            
-            result = await execute_tool_with_config(
-                tool_use.name, tool_use.input, agent_config, fingerprint, personal_doc_cache
-            )
-            
+            logger.info(f"Executing tool: {tool_use['name']}")
+            yield {"type": "tool_executing", "tool": tool_use["name"], "input": tool_use["input"]}
+        
+        parallel = 1 if any(tool_use["name"] in MUTATING_TOOLS for tool_use in tool_uses) else MAX_PARALLEL_TOOLS
+        semaphore = asyncio.Semaphore(parallel)
+        
+        async def run_tool(tool_use: dict[str, Any]) -> str:
+            async with semaphore:
+                return await execute_tool_with_config(
+                    tool_use["name"], tool_use["input"], agent_config, fingerprint, personal_doc_cache,
+                    tool_result_cache,
+                )
+        
+        results = await asyncio.gather(*map(run_tool, tool_uses))
+        
+        # Results go back in the original order so tool_use_ids line up. A
+        # large result identical to one already sent this turn is replaced by
+        # a reference instead of being re-sent on every later call.
+        tool_results = []
+        for tool_use, result in zip(tool_uses, results):
+            content = result
+            if len(result) >= MIN_REF_RESULT_LEN:
+                rid = _result_id(result)
+                if rid in sent_results:
+                    content = f"<ref:{rid}> (unchanged from earlier result of tool call {sent_results[rid]})"
+                else:
+                    sent_results[rid] = tool_use["id"]
             tool_results.append({
                 "type": "tool_result",
-                "tool_use_id": tool_use.id,
-                "content": result,
+                "tool_use_id": tool_use["id"],
+                "content": content,
             })
             
-            yield {"type": "tool_result", "tool": tool_use.name, "result": result[:500]}  # Truncate for UI
+            yield {"type": "tool_result", "tool": tool_use["name"], "result": result[:500]}  # Truncate for UI
         
         # Add tool results to continue conversation
-        messages.append({"role": "user", "content": tool_results})
+        assembler.append({"role": "user", "content": tool_results})
+    
+    # Cache the final answer for near-duplicate questions
+    final_text = "".join(text_chunks)
+    if cache_vector is not None and final_text:
+        semantic_cache.store(cache_scope, cache_vector, final_text)
     
     # Save final conversation state
     add_message(conversation_id, {"role": "user", "content": user_message})
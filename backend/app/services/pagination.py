@@ -0,0 +1,53 @@
+"""
+Cursor paging over Azure Table queries.
+
+Continuation tokens are returned to clients as opaque URL-safe strings.
+"""
+
+from __future__ import annotations
+
+import base64
+from typing import Any, Optional
+
+import orjson
+from azure.data.tables.aio import TableClient
+
+
+def encode_cursor(token: Optional[dict]) -> Optional[str]:
+    """Encode a table continuation token as an opaque cursor string."""
+    if not token:
+        return None
+    return base64.urlsafe_b64encode(orjson.dumps(token)).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """Decode a cursor from encode_cursor. Raises ValueError if malformed."""
+    if not cursor:
+        return None
+    try:
+        token = orjson.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+    if not isinstance(token, dict):
+        raise ValueError("Invalid cursor")
+    return token
+
+
+async def list_entities_page(
+    table: TableClient,
+    limit: int,
+    cursor: Optional[str] = None,
+) -> tuple[list[Any], Optional[str]]:
+    """
+    Fetch one page of entities (in storage order) from a table.
+    
+    Returns (entities, next_cursor); next_cursor is None on the last page.
+    """
+    pages = table.list_entities(results_per_page=limit).by_page(
+        continuation_token=decode_cursor(cursor)
+    )
+    entities: list[Any] = []
+    async for page in pages:
+        entities = [entity async for entity in page]
+        break
+    return entities, encode_cursor(pages.continuation_token)
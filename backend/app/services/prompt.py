@@ -0,0 +1,125 @@
+"""
+Cache-stable prompt assembly for the orchestrator.
+
+Anthropic's prompt cache matches on an exact request prefix. Each request is
+laid out as [system prompt][committed history][this turn's messages]: the
+committed history is never edited or reordered, and everything produced during
+the turn goes strictly after it, so consecutive calls share the longest
+possible byte-identical prefix.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+
+# Anthropic prompt-cache breakpoint marker
+CACHE_CONTROL = {"type": "ephemeral"}
+
+# Rough approximation: ~4 chars per token (conservative estimate)
+CHARS_PER_TOKEN = 4
+
+
+def message_chars(message: dict[str, Any]) -> int:
+    """
+    Character count of a message, for token estimates.
+    
+    String content counts its length; dict blocks (tool results can be nested)
+    count their compact JSON length. SDK block objects are not counted.
+    """
+    content = message.get("content", "")
+    if isinstance(content, str):
+        return len(content)
+    if isinstance(content, list):
+        return sum(
+            len(orjson.dumps(block, default=str))
+            for block in content
+            if isinstance(block, dict)
+        )
+    return 0
+
+
+def _with_cache_marker(message: dict[str, Any]) -> dict[str, Any]:
+    """
+    Copy of a message with a cache breakpoint on its last content block.
+    
+    The stored message is left untouched. Messages whose last block is an SDK
+    object rather than a dict are returned unmarked.
+    """
+    content = message.get("content")
+    if isinstance(content, str):
+        if not content:
+            return message
+        blocks = [{"type": "text", "text": content, "cache_control": CACHE_CONTROL}]
+    elif isinstance(content, list) and content and isinstance(content[-1], dict):
+        blocks = [*content[:-1], {**content[-1], "cache_control": CACHE_CONTROL}]
+    else:
+        return message
+    return {**message, "content": blocks}
+
+
+class PromptAssembler:
+    """
+    Builds the system prompt and messages for each LLM call in one turn.
+    
+    The stored history is held together with its length when the turn starts.
+    Stored histories are append-only and trimming swaps in a new list, so
+    messages from a concurrent turn land past that length and never shift the
+    prefix. The user message and any assistant/tool-result messages from the
+    tool loop are appended to the tail. With cache_control enabled (Claude
+    models), cache breakpoints go on the system prompt, the end of the
+    committed history and the end of the tail, so the next tool-loop iteration
+    and the next turn both hit the cache.
+    """
+    
+    __slots__ = ("_system_prompt", "_history", "_history_len", "_tail", "_cache_control", "_chars")
+    
+    def __init__(
+        self,
+        system_prompt: str,
+        history: list[dict[str, Any]],
+        user_message: str,
+        cache_control: bool = False,
+    ):
+        self._system_prompt = system_prompt
+        self._history = history
+        self._history_len = len(history)
+        self._tail: list[dict[str, Any]] = [{"role": "user", "content": user_message}]
+        self._cache_control = cache_control
+        
+        # Running character total; stored histories keep their own count
+        history_chars = getattr(history, "chars", None)
+        if history_chars is None:
+            history_chars = sum(map(message_chars, history))
+        self._chars = len(system_prompt) + history_chars + len(user_message)
+    
+    def append(self, message: dict[str, Any]) -> None:
+        """Add a message produced during this turn."""
+        self._tail.append(message)
+        self._chars += message_chars(message)
+    
+    def estimated_tokens(self) -> int:
+        """Approximate token count of the system prompt and all messages."""
+        return self._chars // CHARS_PER_TOKEN
+    
+    def __len__(self) -> int:
+        return self._history_len + len(self._tail)
+    
+    def system(self) -> str | list[dict[str, Any]]:
+        """System prompt, as a marked text block when caching."""
+        if not self._cache_control:
+            return self._system_prompt
+        return [{"type": "text", "text": self._system_prompt, "cache_control": CACHE_CONTROL}]
+    
+    def build(self) -> list[dict[str, Any]]:
+        """Messages for the next LLM call: committed history, then this turn."""
+        prefix = self._history[:self._history_len]
+        if not self._cache_control:
+            return [*prefix, *self._tail]
+        
+        messages = [*prefix, *self._tail[:-1], _with_cache_marker(self._tail[-1])]
+        if prefix:
+            count = len(prefix)
+            messages[count - 1] = _with_cache_marker(messages[count - 1])
+        return messages
@@ -0,0 +1,78 @@
+"""
+Semantic response cache for the orchestrator.
+
+Final answers are cached per (agent, fingerprint) against an embedding of the
+conversation so far. A turn whose embedding is close enough to a cached one is
+answered from the cache without calling the LLM or any tools.
+
+Off unless settings.semantic_cache_enabled is set.
+"""
+
+from __future__ import annotations
+
+import math
+import operator
+from collections import deque
+from typing import List, Optional
+
+from cachetools import LRUCache
+
+from app.services.indexer import generate_embeddings_batch
+
+# Cosine similarity needed to reuse an answer
+SIMILARITY_THRESHOLD = 0.92
+
+# Weight of each user message relative to the one after it (latest weighs most)
+DECAY = 0.5
+
+# Bounds: answers kept per (agent, fingerprint), and how many scopes are kept
+MAX_ENTRIES_PER_SCOPE = 32
+MAX_SCOPES = 1_000
+
+_scopes: LRUCache[tuple[str, str], deque[tuple[List[float], str]]] = LRUCache(maxsize=MAX_SCOPES)
+
+
+async def conversation_embedding(user_messages: list[str]) -> Optional[List[float]]:
+    """
+    Embed a conversation as the decayed sum of its user messages' embeddings.
+    
+    Earlier messages are usually served from the indexer's embedding cache, so
+    only the newest one costs an API call. Returns a unit vector, or None if
+    any message could not be embedded.
+    """
+    embeddings = await generate_embeddings_batch(user_messages, input_type="query")
+    if not embeddings or any(embedding is None for embedding in embeddings):
+        return None
+    
+    combined = [0.0] * len(embeddings[-1])
+    count = len(embeddings)
+    for i, embedding in enumerate(embeddings):
+        weight = DECAY ** (count - 1 - i)
+        combined = [total + weight * x for total, x in zip(combined, embedding)]
+    
+    norm = math.sqrt(sum(x * x for x in combined))
+    if not norm:
+        return None
+    return [x / norm for x in combined]
+
+
+def lookup(scope: tuple[str, str], vector: List[float]) -> Optional[str]:
+    """Return the cached answer most similar to vector, if it clears the threshold."""
+    entries = _scopes.get(scope)
+    if not entries:
+        return None
+    
+    best_score, best_response = max(
+        ((sum(map(operator.mul, cached, vector)), response) for cached, response in entries),
+        key=operator.itemgetter(0),
+    )
+    return best_response if best_score >= SIMILARITY_THRESHOLD else None
+
+
+def store(scope: tuple[str, str], vector: List[float], response: str) -> None:
+    """Cache an answer for this scope, evicting its oldest entry when full."""
+    entries = _scopes.get(scope)
+    if entries is None:
+        entries = deque(maxlen=MAX_ENTRIES_PER_SCOPE)
+        _scopes[scope] = entries
+    entries.append((vector, response))
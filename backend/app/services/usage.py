@@ -7,19 +7,27 @@ Quotas reset daily (partition by date).
 
 from __future__ import annotations
 
+import asyncio
 import logging
 from datetime import datetime, timezone
 from typing import Optional
 
+from azure.data.tables import UpdateMode
 from azure.data.tables.aio import TableServiceClient, TableClient
-from azure.core.exceptions import ResourceNotFoundError
+from azure.core import MatchConditions
+from azure.core.exceptions import ResourceExistsError, ResourceModifiedError, ResourceNotFoundError
 
 from app.config import get_settings
+from app.services import geolocation
+from app.services.pagination import list_entities_page
 
 logger = logging.getLogger(__name__)
 
 TABLE_NAME = "DailyUsage"
 
+# Attempts at an ETag-guarded count update before giving up on contention
+RESERVE_RETRIES = 5
+
 
 class UsageTracker:
     """
@@ -35,6 +43,8 @@ class UsageTracker:
         self._client: TableServiceClient | None = None
         self._table: TableClient | None = None
         self._settings = get_settings()
+        # Background location lookups started by check_and_reserve
+        self._location_tasks: set[asyncio.Task] = set()
     
     async def _get_table(self) -> TableClient:
         """Get or create the table client."""
@@ -58,7 +68,10 @@ class UsageTracker:
         return self._table
     
     async def close(self):
-        """Close the table service client."""
+        """Stop pending location lookups and close the table service client."""
+        for task in self._location_tasks:
+            task.cancel()
+        await asyncio.gather(*self._location_tasks, return_exceptions=True)
         if self._client:
             await self._client.close()
             self._client = None
@@ -98,8 +111,6 @@ class UsageTracker:
         Optionally tracks IP address and geographic location.
         Returns the new count.
         """
-        from app.services.geolocation import get_location_from_ip
-        
         table = await self._get_table()
         partition = self._today_partition()
         now = datetime.now(timezone.utc)
@@ -107,7 +118,7 @@ class UsageTracker:
         # Get location from IP if provided
         location = {}
         if ip_address:
-            location = await get_location_from_ip(ip_address)
+            location = await geolocation.get_location_from_ip(ip_address)
         
         try:
             # Try to get existing entity
@@ -147,6 +158,147 @@ class UsageTracker:
         logger.info(f"Fingerprint {fingerprint[:8]}... daily usage: {new_count}")
         return new_count
     
+    async def check_and_reserve(
+        self,
+        fingerprint: str,
+        limit: int | None = None,
+        user_agent: str = "",
+        ip_address: str | None = None,
+    ) -> tuple[bool, int, int, str | None]:
+        """
+        Check the daily quota and, if allowed, count the request in one step.
+        
+        Replaces check_quota() before a turn plus increment_usage() after it.
+        The count is only bumped with an ETag-conditional write, so two
+        concurrent turns can't both pass the check on the last request.
+        If the turn fails, pass the returned reservation to release().
+        
+        Returns (allowed, requests_used, requests_remaining, reservation), where
+        reservation is the date partition the request was counted in, or None
+        when the quota is exhausted.
+        """
+        if limit is None:
+            limit = self._settings.daily_request_limit
+        
+        try:
+            return await self._reserve(fingerprint, limit, user_agent, ip_address)
+        except Exception as e:
+            # Fail open like get_usage: a storage hiccup shouldn't block the user
+            logger.error(f"Failed to reserve quota for {fingerprint[:8]}...: {e}")
+            return (True, 0, limit, None)
+    
+    async def _reserve(
+        self,
+        fingerprint: str,
+        limit: int,
+        user_agent: str,
+        ip_address: str | None,
+    ) -> tuple[bool, int, int, str | None]:
+        """Conditional read-increment loop behind check_and_reserve."""
+        table = await self._get_table()
+        partition = self._today_partition()
+        
+        for _ in range(RESERVE_RETRIES):
+            now = datetime.now(timezone.utc)
+            try:
+                entity = await table.get_entity(partition_key=partition, row_key=fingerprint)
+            except ResourceNotFoundError:
+                entity = None
+            
+            # The IP is stored with the count; its location is looked up after
+            # the write, off the request path
+            new_ip = bool(ip_address) and (entity is None or not entity.get("IPAddress"))
+            if entity is None:
+                if limit <= 0:
+                    return (False, 0, 0, None)
+                entity = {
+                    "PartitionKey": partition,
+                    "RowKey": fingerprint,
+                    "RequestCount": 1,
+                    "FirstRequestAt": now,
+                    "LastRequestAt": now,
+                    "UserAgent": user_agent[:500] if user_agent else "",
+                }
+                if new_ip:
+                    entity["IPAddress"] = ip_address
+                try:
+                    await table.create_entity(entity)
+                except ResourceExistsError:
+                    continue  # Another turn created it first - re-read
+                used = 1
+            else:
+                used = entity.get("RequestCount", 0)
+                if used >= limit:
+                    return (False, used, 0, None)
+                used += 1
+                entity["RequestCount"] = used
+                entity["LastRequestAt"] = now
+                if new_ip:
+                    entity["IPAddress"] = ip_address
+                try:
+                    await table.update_entity(
+                        entity,
+                        mode=UpdateMode.MERGE,
+                        etag=entity.metadata["etag"],
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                except ResourceModifiedError:
+                    continue  # Count changed since the read - re-check
+            
+            if new_ip:
+                self._record_location_later(partition, fingerprint, ip_address)
+            logger.info(f"Fingerprint {fingerprint[:8]}... reserved request {used}/{limit}")
+            return (True, used, max(0, limit - used), partition)
+        
+        raise RuntimeError(f"Could not reserve quota for {fingerprint[:8]}... (contention)")
+    
+    async def release(self, fingerprint: str, reservation: str) -> None:
+        """Give back a request counted by check_and_reserve() (e.g. the turn failed)."""
+        table = await self._get_table()
+        try:
+            for _ in range(RESERVE_RETRIES):
+                entity = await table.get_entity(partition_key=reservation, row_key=fingerprint)
+                entity["RequestCount"] = max(0, entity.get("RequestCount", 0) - 1)
+                try:
+                    await table.update_entity(
+                        entity,
+                        mode=UpdateMode.MERGE,
+                        etag=entity.metadata["etag"],
+                        match_condition=MatchConditions.IfNotModified,
+                    )
+                    return
+                except ResourceModifiedError:
+                    continue
+            logger.warning(f"Gave up releasing reservation for {fingerprint[:8]}... (contention)")
+        except Exception as e:
+            logger.error(f"Failed to release reservation for {fingerprint[:8]}...: {e}")
+    
+    def _record_location_later(self, partition: str, fingerprint: str, ip_address: str) -> None:
+        """Start a tracked background task that records an IP's location."""
+        task = asyncio.create_task(self._record_location(partition, fingerprint, ip_address))
+        self._location_tasks.add(task)
+        task.add_done_callback(self._location_tasks.discard)
+    
+    async def _record_location(self, partition: str, fingerprint: str, ip_address: str) -> None:
+        """Look up an IP's location and merge it onto a usage entity."""
+        try:
+            location = await geolocation.get_location_from_ip(ip_address)
+            if not location:
+                return
+            table = await self._get_table()
+            # Merge touches only these columns, so no ETag is needed
+            await table.update_entity(
+                {
+                    "PartitionKey": partition,
+                    "RowKey": fingerprint,
+                    "Country": location.get("country", ""),
+                    "City": location.get("city", ""),
+                },
+                mode=UpdateMode.MERGE,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to record location for {fingerprint[:8]}...: {e}")
+    
     async def get_remaining(self, fingerprint: str, limit: int | None = None) -> tuple[int, int]:
         """
         Get usage stats for a fingerprint.
@@ -179,27 +331,49 @@ class UsageTracker:
         """
         table = await self._get_table()
         
-        records = []
-        async for entity in table.list_entities():
-            records.append({
-                "date": entity.get("PartitionKey", ""),
-                "fingerprint": entity.get("RowKey", ""),
-                "request_count": entity.get("RequestCount", 0),
-                "first_request_at": entity.get("FirstRequestAt"),
-                "last_request_at": entity.get("LastRequestAt"),
-                "user_agent": entity.get("UserAgent", ""),
-                "ip_address": entity.get("IPAddress", ""),
-                "country": entity.get("Country", ""),
-                "city": entity.get("City", ""),
-            })
-        
-        # Sort by date descending, then by last_request_at descending
+        records = [self._to_record(entity) async for entity in table.list_entities()]
+        self._sort_records(records)
+        return records
+    
+    async def list_usage_page(
+        self,
+        limit: int = 200,
+        cursor: str | None = None,
+    ) -> tuple[list[dict], str | None]:
+        """
+        List one page of usage records, in storage order (date ascending).
+        Records within the page are sorted like list_all_usage.
+        Returns (records, next_cursor); next_cursor is None on the last page.
+        Raises ValueError for a malformed cursor.
+        """
+        table = await self._get_table()
+        entities, next_cursor = await list_entities_page(table, limit, cursor)
+        records = [self._to_record(entity) for entity in entities]
+        self._sort_records(records)
+        return records, next_cursor
+    
+    @staticmethod
+    def _to_record(entity: dict) -> dict:
+        """Convert a usage entity to an API record."""
+        return {
+            "date": entity.get("PartitionKey", ""),
+            "fingerprint": entity.get("RowKey", ""),
+            "request_count": entity.get("RequestCount", 0),
+            "first_request_at": entity.get("FirstRequestAt"),
+            "last_request_at": entity.get("LastRequestAt"),
+            "user_agent": entity.get("UserAgent", ""),
+            "ip_address": entity.get("IPAddress", ""),
+            "country": entity.get("Country", ""),
+            "city": entity.get("City", ""),
+        }
+    
+    @staticmethod
+    def _sort_records(records: list[dict]) -> None:
+        """Sort by date descending, then by last_request_at descending."""
         records.sort(
             key=lambda r: (r["date"], r["last_request_at"] or ""), 
             reverse=True
         )
-        
-        return records
 
 
 # Module-level singleton
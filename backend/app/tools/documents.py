@@ -8,6 +8,7 @@ through the chat interface.
 from __future__ import annotations
 
 import logging
+from datetime import datetime
 from typing import Any, Optional
 
 import httpx
@@ -175,7 +176,6 @@ async def list_my_documents(
                 if uploaded_at and "T" in str(uploaded_at):
                     # Parse ISO format and make it readable
                     try:
-                        from datetime import datetime
                         dt = datetime.fromisoformat(uploaded_at.replace("Z", "+00:00"))
                         uploaded_at = dt.strftime("%Y-%m-%d %H:%M")
                     except Exception:
@@ -12,6 +12,7 @@ Implements cache-first pattern for fetch_drs_document:
 from __future__ import annotations
 
 import logging
+import re
 from typing import Any, Optional, List
 
 import httpx
@@ -347,7 +348,6 @@ async def _do_download_and_extract(
 
 def _normalize_doc_number(doc_num: str) -> str:
     """Normalize document number for comparison."""
-    import re
     normalized = doc_num.upper().strip()
     # Normalize whitespace
     normalized = re.sub(r'\s+', ' ', normalized)
@@ -358,7 +358,6 @@ def _normalize_doc_number(doc_num: str) -> str:
 
 def _get_base_doc_number(doc_num: str) -> str:
     """Get base document number without CHG/Ed Update suffixes."""
-    import re
     normalized = _normalize_doc_number(doc_num)
     # Remove CHG #, Ed Update, etc.
     normalized = re.sub(r'\s+(CHG|CHANGE)\s*\d*$', '', normalized, flags=re.IGNORECASE)
@@ -176,8 +176,6 @@ def _extract_text_from_xml(xml_content: str) -> str:
     This is a simple extraction - could be enhanced with proper XML parsing
     if we need structured data.
     """
-    import re
-    
     # Remove XML tags but preserve structure
     text = xml_content
     
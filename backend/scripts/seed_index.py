@@ -20,6 +20,8 @@ import httpx
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.config import get_settings
+from app.http_client import close_http_client
+from app.services.indexer import upload_batch_to_index
 from app.tools.fetch_cfr import fetch_cfr_section
 
 logging.basicConfig(level=logging.INFO)
@@ -99,38 +101,6 @@ async def generate_embedding(text: str, settings, input_type: str = "document")
             return None
 
 
-async def index_document(doc: dict, settings) -> bool:
-    """Upload a document to Azure AI Search."""
-    endpoint = settings.azure_search_endpoint
-    index = settings.azure_search_index
-    api_key = settings.azure_search_key
-    
-    url = f"{endpoint}/indexes/{index}/docs/index?api-version=2024-07-01"
-    
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.post(
-                url,
-                headers={
-                    "Content-Type": "application/json",
-                    "api-key": api_key,
-                },
-                json={
-                    "value": [
-                        {
-                            "@search.action": "upload",
-                            **doc,
-                        }
-                    ]
-                },
-            )
-            response.raise_for_status()
-            return True
-        except Exception as e:
-            logger.error(f"Index error for {doc.get('id')}: {e}")
-            return False
-
-
 async def seed_index():
     """Fetch CFR sections and index them."""
     settings = get_settings()
@@ -141,7 +111,8 @@ async def seed_index():
     
     logger.info(f"Seeding index with {len(SECTIONS_TO_INDEX)} CFR sections...")
     
-    success_count = 0
+    docs = []
+    labels = []
     
     for part, section in SECTIONS_TO_INDEX:
         logger.info(f"Fetching 14 CFR {part}.{section}...")
@@ -171,17 +142,22 @@ async def seed_index():
         if embedding:
             doc["embedding"] = embedding
         
-        # Index document
-        if await index_document(doc, settings):
-            success_count += 1
-            logger.info(f"✓ Indexed {part}.{section}")
-        else:
-            logger.error(f"✗ Failed to index {part}.{section}")
+        docs.append(doc)
+        labels.append(f"{part}.{section}")
         
         # Small delay to avoid rate limiting
         await asyncio.sleep(0.5)
     
-    logger.info(f"\nDone! Indexed {success_count}/{len(SECTIONS_TO_INDEX)} documents.")
+    # Index all documents in batched calls
+    results = await upload_batch_to_index(docs)
+    await close_http_client()
+    for label, ok in zip(labels, results):
+        if ok:
+            logger.info(f"✓ Indexed {label}")
+        else:
+            logger.error(f"✗ Failed to index {label}")
+    
+    logger.info(f"\nDone! Indexed {sum(results)}/{len(SECTIONS_TO_INDEX)} documents.")
 
 
 if __name__ == "__main__":
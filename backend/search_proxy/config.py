@@ -25,6 +25,9 @@ class Settings(BaseSettings):
     # Valid index names
     valid_indexes: list[str] = ["faa-agent", "nrc-agent", "dod-agent"]
 
+    # Largest request body accepted after gzip inflation (bytes)
+    max_request_body_bytes: int = 32 * 1024 * 1024
+
     # App Settings
     debug: bool = False
     log_level: str = "INFO"
@@ -19,11 +19,13 @@ Security Model:
 from __future__ import annotations
 
 import logging
+import zlib
 from datetime import datetime
-from typing import Any, Optional, List
+from typing import Any, Callable, Coroutine, Optional, List
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.routing import APIRoute
 from pydantic import BaseModel, Field
 
 from search_proxy.config import get_settings
@@ -35,11 +37,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+class GzipRequest(Request):
+    """Request whose body is transparently inflated when sent gzip-encoded."""
+    
+    async def body(self) -> bytes:
+        if not hasattr(self, "_body"):
+            body = await super().body()
+            if "gzip" in self.headers.getlist("Content-Encoding"):
+                # Inflate at most the body cap, so a small bomb can't balloon in memory
+                limit = get_settings().max_request_body_bytes
+                inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                try:
+                    body = inflater.decompress(body, limit)
+                except zlib.error as e:
+                    raise HTTPException(status_code=400, detail=f"Invalid gzip request body: {e}")
+                if inflater.unconsumed_tail:
+                    raise HTTPException(status_code=413, detail=f"Request body exceeds {limit} bytes")
+                if not inflater.eof:
+                    raise HTTPException(status_code=400, detail="Invalid gzip request body: truncated")
+            self._body = body
+        return self._body
+
+
+class GzipRoute(APIRoute):
+    """Route that accepts gzip-encoded request bodies (the backend gzips /index payloads)."""
+    
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        original_route_handler = super().get_route_handler()
+        
+        async def route_handler(request: Request) -> Response:
+            return await original_route_handler(GzipRequest(request.scope, request.receive))
+        
+        return route_handler
+
+
 app = FastAPI(
     title="Search Proxy",
     description="Fingerprint-enforced search proxy for personal document isolation",
     version="1.0.0",
 )
+app.router.route_class = GzipRoute
 
 
 # -----------------------------------------------------------------------------
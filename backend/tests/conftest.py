@@ -39,6 +39,15 @@ def client() -> TestClient:
     return TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def reset_http_clients():
+    """Drop the shared HTTP client so each test builds (or mocks) its own."""
+    from app import http_client
+    http_client._http_client = None
+    yield
+    http_client._http_client = None
+
+
 @pytest.fixture
 def mock_azure_blob():
     """Mock Azure Blob Storage client."""
@@ -123,7 +132,7 @@ def mock_claude_client():
 @pytest.fixture
 def valid_jwt_token(test_settings) -> str:
     """Generate a valid JWT token for testing."""
-    from jose import jwt
+    import jwt
     from datetime import datetime, timedelta, timezone
     
     payload = {
@@ -138,7 +147,7 @@ def valid_jwt_token(test_settings) -> str:
 @pytest.fixture
 def admin_jwt_token(test_settings) -> str:
     """Generate an admin JWT token for testing."""
-    from jose import jwt
+    import jwt
     from datetime import datetime, timedelta, timezone
     
     payload = {
@@ -153,7 +162,7 @@ def admin_jwt_token(test_settings) -> str:
 @pytest.fixture
 def expired_jwt_token(test_settings) -> str:
     """Generate an expired JWT token for testing."""
-    from jose import jwt
+    import jwt
     from datetime import datetime, timedelta, timezone
     
     payload = {
@@ -220,23 +229,6 @@ startxref
 """
 
 
-@pytest.fixture
-async def test_db():
-    """In-memory SQLite database for testing."""
-    import aiosqlite
-    from app.database import init_db
-    
-    # Use in-memory database
-    db_path = ":memory:"
-    
-    # Initialize schema
-    await init_db(db_path)
-    
-    # Connect for tests
-    async with aiosqlite.connect(db_path) as db:
-        yield db
-
-
 @pytest.fixture
 def mock_embeddings_response():
     """Mock response from Azure AI Services embeddings API."""
@@ -155,7 +155,7 @@ def test_user_fingerprint():
 def test_user_token():
     """Provide a test JWT token."""
     from datetime import datetime, timedelta
-    from jose import jwt
+    import jwt
     
     # Create a valid JWT token
     payload = {
@@ -174,7 +174,7 @@ def test_user_token():
 def test_admin_token():
     """Provide a test admin JWT token."""
     from datetime import datetime, timedelta
-    from jose import jwt
+    import jwt
     
     # Create a valid JWT token with admin role
     payload = {
@@ -180,7 +180,7 @@ class TestJWTTokens:
     
     def test_jwt_token_contains_fingerprint(self, valid_jwt_token, test_settings):
         """Test that generated token contains fingerprint."""
-        from jose import jwt
+        import jwt
         
         payload = jwt.decode(valid_jwt_token, test_settings.jwt_secret, algorithms=["HS256"])
         assert "fingerprint" in payload
@@ -188,7 +188,7 @@ class TestJWTTokens:
     
     def test_jwt_token_contains_is_admin(self, valid_jwt_token, test_settings):
         """Test that generated token contains is_admin flag."""
-        from jose import jwt
+        import jwt
         
         payload = jwt.decode(valid_jwt_token, test_settings.jwt_secret, algorithms=["HS256"])
         assert "is_admin" in payload
@@ -196,7 +196,7 @@ class TestJWTTokens:
     
     def test_jwt_token_has_expiration(self, valid_jwt_token, test_settings):
         """Test that token has expiration time."""
-        from jose import jwt
+        import jwt
         
         payload = jwt.decode(valid_jwt_token, test_settings.jwt_secret, algorithms=["HS256"])
         assert "exp" in payload
@@ -204,7 +204,8 @@ class TestJWTTokens:
     
     def test_expired_token_rejected(self, expired_jwt_token, test_settings):
         """Test that expired token is rejected."""
-        from jose import jwt, JWTError
+        import jwt
+        from jwt import InvalidTokenError as JWTError
         
         with pytest.raises(JWTError):
             jwt.decode(
@@ -216,18 +217,40 @@ class TestJWTTokens:
     
     def test_invalid_token_rejected(self, test_settings):
         """Test that malformed token is rejected."""
-        from jose import jwt, JWTError
+        import jwt
+        from jwt import InvalidTokenError as JWTError
         
         with pytest.raises(JWTError):
             jwt.decode("invalid.token.here", test_settings.jwt_secret, algorithms=["HS256"])
     
     def test_token_with_wrong_secret_rejected(self, valid_jwt_token):
         """Test that token signed with wrong secret is rejected."""
-        from jose import jwt, JWTError
+        import jwt
+        from jwt import InvalidTokenError as JWTError
         
         with pytest.raises(JWTError):
             jwt.decode(valid_jwt_token, "wrong-secret", algorithms=["HS256"])
 
+    def test_decode_caches_valid_token(self, valid_jwt_token):
+        """Test that a verified token is served from cache on repeat decodes."""
+        from app.routers import auth
+
+        auth._jwt_cache.clear()
+        first = auth.decode_jwt_token(valid_jwt_token)
+        with patch("app.routers.auth.jwt.decode") as mock_decode:
+            second = auth.decode_jwt_token(valid_jwt_token)
+
+        mock_decode.assert_not_called()
+        assert second == first
+
+    def test_decode_does_not_cache_invalid_token(self):
+        """Test that failed verifications are never cached."""
+        from app.routers import auth
+
+        auth._jwt_cache.clear()
+        assert auth.decode_jwt_token("invalid.token.here") is None
+        assert len(auth._jwt_cache) == 0
+
 
 @pytest.mark.unit
 class TestAuthEndpointIntegration:
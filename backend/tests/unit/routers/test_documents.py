@@ -323,6 +323,22 @@ class TestDocumentUploadFlow:
         
         # Should succeed - fingerprint is enough, JWT not required
         assert response.status_code in [200, 202]
+    
+    @patch("app.routers.documents.extract_text_from_pdf")
+    @patch("app.routers.documents.get_user_documents", new_callable=AsyncMock)
+    def test_duplicate_rejected_before_extraction(self, mock_documents, mock_extract, client, sample_pdf_bytes):
+        """Test a duplicate upload is rejected without extracting its text."""
+        from app.routers.documents import compute_file_hash
+        mock_documents.return_value = (1, {compute_file_hash(sample_pdf_bytes)})
+        
+        response = client.post(
+            "/documents",
+            data={"fingerprint": "test-fingerprint-12345"},
+            files={"file": ("test.pdf", BytesIO(sample_pdf_bytes), "application/pdf")}
+        )
+        
+        assert response.status_code == 409
+        mock_extract.assert_not_called()
 
 
 @pytest.mark.unit
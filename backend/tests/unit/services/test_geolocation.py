@@ -0,0 +1,39 @@
+"""
+IP geolocation tests.
+
+Tests client address normalization ahead of the ip-api.com lookup.
+"""
+
+import pytest
+
+from app.services.geolocation import _normalize_ip
+
+
+@pytest.mark.unit
+class TestNormalizeIp:
+    """Tests for _normalize_ip."""
+    
+    @pytest.mark.parametrize("raw, expected", [
+        ("8.8.8.8", "8.8.8.8"),
+        ("8.8.8.8:51234", "8.8.8.8"),
+        ("2001:4860:4860::8888", "2001:4860:4860::8888"),
+        ("[2001:4860:4860::8888]:443", "2001:4860:4860::8888"),
+        ("2001:4860:4860:0:0:0:0:8888", "2001:4860:4860::8888"),
+    ])
+    def test_public_addresses(self, raw, expected):
+        """Test ports are stripped and IPv6 addresses are kept whole."""
+        assert _normalize_ip(raw) == expected
+    
+    @pytest.mark.parametrize("raw", [
+        "127.0.0.1",
+        "::1",
+        "[::1]:8080",
+        "10.0.0.5:443",
+        "192.168.1.20",
+        "localhost",
+        "not-an-ip",
+        " ",
+    ])
+    def test_local_and_invalid_addresses(self, raw):
+        """Test addresses with no geolocation are rejected."""
+        assert _normalize_ip(raw) is None
@@ -0,0 +1,115 @@
+"""
+Document indexer tests.
+
+Tests the transient-failure retry around embedding and index calls
+and embedding input handling.
+"""
+
+import httpx
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.services import indexer
+
+
+def _response(status_code: int, headers: dict | None = None) -> httpx.Response:
+    """Build a response bound to a request, so raise_for_status() works."""
+    request = httpx.Request("POST", "https://example.test/embeddings")
+    return httpx.Response(status_code, headers=headers, request=request)
+
+
+@pytest.fixture
+def mock_client():
+    """Pooled client stand-in whose post() results are set per test."""
+    client = MagicMock()
+    client.post = AsyncMock()
+    with patch("app.services.indexer.get_http_client", return_value=client):
+        yield client
+
+
+@pytest.mark.unit
+class TestPostWithRetry:
+    """Tests for _post_with_retry."""
+    
+    @pytest.mark.asyncio
+    async def test_retries_transient_status(self, mock_client):
+        """Test 503 and 429 are retried, honoring Retry-After."""
+        mock_client.post.side_effect = [
+            _response(503),
+            _response(429, {"Retry-After": "2"}),
+            _response(200),
+        ]
+        
+        with patch("app.services.indexer.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            response = await indexer._post_with_retry(
+                "https://example.test/embeddings", timeout=1.0, headers={}, content=b"{}"
+            )
+        
+        assert response.status_code == 200
+        assert mock_client.post.await_count == 3
+        assert mock_sleep.await_args_list[1].args[0] == 2.0
+    
+    @pytest.mark.asyncio
+    async def test_does_not_retry_client_error(self, mock_client):
+        """Test a 400 raises immediately."""
+        mock_client.post.return_value = _response(400)
+        
+        with patch("app.services.indexer.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+            with pytest.raises(httpx.HTTPStatusError):
+                await indexer._post_with_retry(
+                    "https://example.test/embeddings", timeout=1.0, headers={}, content=b"{}"
+                )
+        
+        assert mock_client.post.await_count == 1
+        mock_sleep.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self, mock_client):
+        """Test a persistent 503 raises after MAX_RETRIES retries."""
+        mock_client.post.return_value = _response(503)
+        
+        with patch("app.services.indexer.asyncio.sleep", new_callable=AsyncMock):
+            with pytest.raises(httpx.HTTPStatusError):
+                await indexer._post_with_retry(
+                    "https://example.test/embeddings", timeout=1.0, headers={}, content=b"{}"
+                )
+        
+        assert mock_client.post.await_count == indexer.MAX_RETRIES + 1
+
+
+@pytest.mark.unit
+class TestGenerateEmbeddingsBatch:
+    """Tests for generate_embeddings_batch input handling."""
+    
+    @pytest.mark.asyncio
+    async def test_empty_input_returns_empty(self, mock_client):
+        """Test an empty list makes no request."""
+        assert await indexer.generate_embeddings_batch([]) == []
+        mock_client.post.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_blank_texts_are_not_sent(self, mock_client):
+        """Test blank texts get None without an API call."""
+        target = ("https://example.test/embeddings", {}, "embed-model")
+        with patch("app.services.indexer._embedding_target", return_value=target):
+            results = await indexer.generate_embeddings_batch(["", "   \n"])
+        
+        assert results == [None, None]
+        mock_client.post.assert_not_awaited()
+    
+    @pytest.mark.asyncio
+    async def test_embeddings_placed_by_index(self, mock_client):
+        """Test embeddings are matched to inputs by index, not response order."""
+        indexer._embedding_cache.clear()
+        request = httpx.Request("POST", "https://example.test/embeddings")
+        mock_client.post.return_value = httpx.Response(200, request=request, json={
+            "data": [
+                {"index": 1, "embedding": [2.0]},
+                {"index": 0, "embedding": [1.0]},
+            ],
+        })
+        target = ("https://example.test/embeddings", {}, "embed-model")
+        with patch("app.services.indexer._embedding_target", return_value=target):
+            results = await indexer.generate_embeddings_batch(["first text", "second text"])
+        
+        assert results == [[1.0], [2.0]]
@@ -9,6 +9,8 @@ import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
 
 from app.services.orchestrator import (
+    _async_events,
+    _retry_delay,
     execute_tool_with_config,
     handle_conversation,
 )
@@ -263,6 +265,92 @@ class TestToolExecution:
         # Should return non-empty fallback message
         assert result.strip()
         assert "returned no content" in result
+    
+    @pytest.mark.asyncio
+    async def test_execute_tool_memoizes_repeat_calls(self, faa_agent_config):
+        """Test a repeated call with the same input is served from the tool-result cache."""
+        mock_fetch = AsyncMock(side_effect=mock_fetch_cfr)
+        faa_agent_config.tool_implementations["fetch_cfr_section"] = mock_fetch
+        tool_result_cache = {}
+        
+        for _ in range(2):
+            result = await execute_tool_with_config(
+                "fetch_cfr_section",
+                {"part": "25", "section": "1317"},
+                faa_agent_config,
+                tool_result_cache=tool_result_cache,
+            )
+            assert result == "CFR text"
+        
+        mock_fetch.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_execute_tool_does_not_memoize_errors(self, faa_agent_config):
+        """Test failed calls are retried rather than cached."""
+        mock_fetch = AsyncMock(side_effect=[ValueError("eCFR down"), "CFR text"])
+        faa_agent_config.tool_implementations["fetch_cfr_section"] = mock_fetch
+        tool_result_cache = {}
+        
+        first = await execute_tool_with_config(
+            "fetch_cfr_section", {"part": "25", "section": "1317"}, faa_agent_config,
+            tool_result_cache=tool_result_cache,
+        )
+        second = await execute_tool_with_config(
+            "fetch_cfr_section", {"part": "25", "section": "1317"}, faa_agent_config,
+            tool_result_cache=tool_result_cache,
+        )
+        
+        assert "Error executing" in first
+        assert second == "CFR text"
+        assert mock_fetch.call_count == 2
+
+
+@pytest.mark.unit
+class TestStreamAdapter:
+    """Tests for reading sync and async LLM streams."""
+    
+    def test_async_stream_passes_through(self):
+        """Test an async stream is used as-is."""
+        stream = MockLiteLLMStream([])
+        assert _async_events(stream) is stream
+    
+    @pytest.mark.asyncio
+    async def test_sync_stream_read_in_thread(self):
+        """Test a sync stream's events arrive in order."""
+        events = [event async for event in _async_events(iter(range(100)))]
+        assert events == list(range(100))
+    
+    @pytest.mark.asyncio
+    async def test_sync_stream_error_is_raised(self):
+        """Test an error in the sync stream surfaces to the consumer."""
+        def failing():
+            yield "first"
+            raise RuntimeError("stream broke")
+        
+        events = []
+        with pytest.raises(RuntimeError, match="stream broke"):
+            async for event in _async_events(failing()):
+                events.append(event)
+        assert events == ["first"]
+
+
+@pytest.mark.unit
+class TestRetryDelay:
+    """Tests for LLM retry backoff."""
+    
+    def test_backoff_is_jittered_and_capped(self):
+        """Test delays stay within +/-50% of the capped exponential step."""
+        error = Exception("overloaded")
+        for attempt, step in [(0, 1.0), (2, 4.0), (10, 30.0)]:
+            delays = {_retry_delay(attempt, error) for _ in range(20)}
+            assert all(step * 0.5 <= delay <= step * 1.5 for delay in delays)
+            assert len(delays) > 1
+    
+    def test_honors_retry_after(self):
+        """Test a Retry-After header on the error's response wins."""
+        error = Exception("rate limited")
+        error.response = MagicMock(headers={"retry-after": "7"})
+        assert _retry_delay(0, error) == 7.0
 
 
 @pytest.mark.unit
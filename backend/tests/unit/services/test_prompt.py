@@ -0,0 +1,118 @@
+"""
+Prompt assembly tests.
+
+Tests the cache-stable message layout built by PromptAssembler.
+"""
+
+import pytest
+
+from app.services.prompt import CACHE_CONTROL, PromptAssembler, message_chars
+
+
+@pytest.fixture
+def history():
+    """Two committed turns."""
+    return [
+        {"role": "user", "content": "What is HIRF?"},
+        {"role": "assistant", "content": [{"type": "text", "text": "High-Intensity Radiated Fields."}]},
+    ]
+
+
+@pytest.mark.unit
+class TestPromptAssembler:
+    """Tests for PromptAssembler."""
+    
+    def test_layout_without_cache_control(self, history):
+        """Test history comes first, then this turn, with nothing marked."""
+        assembler = PromptAssembler("System", history, "Follow-up?")
+        assembler.append({"role": "assistant", "content": "Answer"})
+        
+        assert assembler.build() == [
+            *history,
+            {"role": "user", "content": "Follow-up?"},
+            {"role": "assistant", "content": "Answer"},
+        ]
+        assert assembler.system() == "System"
+        assert len(assembler) == 4
+    
+    def test_cache_markers(self, history):
+        """Test breakpoints on the system prompt, history end and tail end."""
+        assembler = PromptAssembler("System", history, "Follow-up?", cache_control=True)
+        messages = assembler.build()
+        
+        assert assembler.system() == [{"type": "text", "text": "System", "cache_control": CACHE_CONTROL}]
+        assert "cache_control" not in str(messages[0])
+        assert messages[1]["content"][-1]["cache_control"] == CACHE_CONTROL
+        assert messages[2]["content"] == [
+            {"type": "text", "text": "Follow-up?", "cache_control": CACHE_CONTROL}
+        ]
+    
+    def test_history_is_not_mutated(self, history):
+        """Test markers are added to copies, never to stored messages."""
+        assembler = PromptAssembler("System", history, "Follow-up?", cache_control=True)
+        assembler.build()
+        
+        assert "cache_control" not in history[1]["content"][-1]
+    
+    def test_prefix_is_stable_across_iterations(self, history):
+        """Test tool-loop appends never change the committed prefix."""
+        assembler = PromptAssembler("System", history, "Follow-up?", cache_control=True)
+        first = assembler.build()
+        assembler.append({"role": "assistant", "content": [{"type": "tool_use", "id": "t1"}]})
+        assembler.append({"role": "user", "content": [{"type": "tool_result", "tool_use_id": "t1"}]})
+        second = assembler.build()
+        
+        assert second[:2] == first[:2]
+        assert second[2] == {"role": "user", "content": "Follow-up?"}
+        assert second[-1]["content"][-1]["cache_control"] == CACHE_CONTROL
+    
+    def test_history_appended_mid_turn_is_ignored(self, history):
+        """Test messages added to the stored history after the turn starts stay out."""
+        assembler = PromptAssembler("System", history, "Follow-up?")
+        history.append({"role": "user", "content": "From another turn"})
+        
+        assert assembler.build()[-1] == {"role": "user", "content": "Follow-up?"}
+        assert len(assembler) == 3
+    
+    def test_history_trimmed_mid_turn_is_unaffected(self, monkeypatch):
+        """Test trimming the stored history after the turn starts doesn't shift the prefix."""
+        from app.services import conversation
+        
+        monkeypatch.setattr(conversation, "MAX_MESSAGES_PER_CONVERSATION", 2)
+        conversation.clear_history("conv-trim")
+        conversation.add_message("conv-trim", {"role": "user", "content": "What is HIRF?"})
+        conversation.add_message("conv-trim", {"role": "assistant", "content": "High-Intensity Radiated Fields."})
+        assembler = PromptAssembler("System", conversation.get_history("conv-trim"), "Follow-up?")
+        conversation.add_message("conv-trim", {"role": "user", "content": "From another turn"})
+        
+        assert len(conversation.get_history("conv-trim")) == 2
+        assert assembler.build()[0] == {"role": "user", "content": "What is HIRF?"}
+        assert len(assembler.build()) == 3
+
+
+@pytest.mark.unit
+class TestTokenEstimate:
+    """Tests for the assembler's running token estimate."""
+    
+    def test_estimate_grows_with_appends(self, history):
+        """Test appends add to the estimate without a rescan."""
+        assembler = PromptAssembler("S" * 40, history, "Q" * 40)
+        before = assembler.estimated_tokens()
+        assembler.append({"role": "assistant", "content": "A" * 400})
+        
+        assert assembler.estimated_tokens() == before + 100
+    
+    def test_uses_stored_history_count(self):
+        """Test a stored History's running count matches a fresh count."""
+        from app.services import conversation
+        
+        conversation.clear_history("conv-chars")
+        for i in range(conversation.MAX_MESSAGES_PER_CONVERSATION + 4):
+            conversation.add_message("conv-chars", {"role": "user", "content": "x" * (i + 1)})
+        stored = conversation.get_history("conv-chars")
+        
+        assert stored.chars == sum(map(message_chars, stored))
+        assert (
+            PromptAssembler("S", stored, "Q").estimated_tokens()
+            == PromptAssembler("S", list(stored), "Q").estimated_tokens()
+        )
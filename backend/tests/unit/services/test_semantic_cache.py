@@ -0,0 +1,71 @@
+"""
+Semantic response cache tests.
+
+Tests conversation embedding and similarity lookup in app.services.semantic_cache.
+"""
+
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from app.services import semantic_cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Start each test with an empty cache."""
+    semantic_cache._scopes.clear()
+    yield
+    semantic_cache._scopes.clear()
+
+
+@pytest.mark.unit
+class TestLookup:
+    """Tests for store/lookup."""
+    
+    def test_hit_above_threshold(self):
+        """Test a near-identical vector returns the cached answer."""
+        semantic_cache.store(("faa", "fp"), [1.0, 0.0], "Cached answer")
+        
+        assert semantic_cache.lookup(("faa", "fp"), [0.99, 0.141]) == "Cached answer"
+    
+    def test_miss_below_threshold(self):
+        """Test a dissimilar vector misses."""
+        semantic_cache.store(("faa", "fp"), [1.0, 0.0], "Cached answer")
+        
+        assert semantic_cache.lookup(("faa", "fp"), [0.0, 1.0]) is None
+    
+    def test_scopes_are_isolated(self):
+        """Test answers never leak across agents or fingerprints."""
+        semantic_cache.store(("faa", "fp"), [1.0, 0.0], "Cached answer")
+        
+        assert semantic_cache.lookup(("nrc", "fp"), [1.0, 0.0]) is None
+        assert semantic_cache.lookup(("faa", "other-fp"), [1.0, 0.0]) is None
+
+
+@pytest.mark.unit
+class TestConversationEmbedding:
+    """Tests for conversation_embedding."""
+    
+    @pytest.mark.asyncio
+    async def test_latest_message_weighs_most(self):
+        """Test the decayed sum leans toward the newest message and is unit length."""
+        embeddings = [[1.0, 0.0], [0.0, 1.0]]
+        with patch(
+            "app.services.semantic_cache.generate_embeddings_batch",
+            new_callable=AsyncMock,
+            return_value=embeddings,
+        ):
+            vector = await semantic_cache.conversation_embedding(["first", "second"])
+        
+        assert vector[1] > vector[0]
+        assert sum(x * x for x in vector) == pytest.approx(1.0)
+    
+    @pytest.mark.asyncio
+    async def test_unembeddable_message_disables_cache(self):
+        """Test a failed embedding yields None."""
+        with patch(
+            "app.services.semantic_cache.generate_embeddings_batch",
+            new_callable=AsyncMock,
+            return_value=[[1.0, 0.0], None],
+        ):
+            assert await semantic_cache.conversation_embedding(["first", ""]) is None
@@ -5,10 +5,11 @@ Tests the UsageTracker class that manages daily request quotas
 backed by Azure Table Storage.
 """
 
+import asyncio
 import pytest
 from datetime import datetime, timezone
 from unittest.mock import AsyncMock, patch, MagicMock
-from azure.core.exceptions import ResourceNotFoundError
+from azure.core.exceptions import ResourceModifiedError, ResourceNotFoundError
 
 from app.services.usage import UsageTracker, get_usage_tracker
 
@@ -19,6 +20,11 @@ def test_fingerprint():
     return "test-fp-12345"
 
 
+class FakeEntity(dict):
+    """Dict with the etag metadata that TableEntity carries."""
+    metadata = {"etag": "W/\"1\""}
+
+
 @pytest.fixture
 def tracker():
     """UsageTracker instance for testing."""
@@ -237,6 +243,85 @@ class TestCheckQuota:
         assert allowed is False
 
 
+@pytest.mark.unit
+class TestCheckAndReserve:
+    """Tests for check_and_reserve / release."""
+    
+    @pytest.mark.asyncio
+    async def test_reserve_creates_new_entity(self, tracker, test_fingerprint):
+        """Test first request of the day creates the entity with count 1."""
+        mock_table = AsyncMock()
+        mock_table.get_entity = AsyncMock(side_effect=ResourceNotFoundError())
+        mock_table.create_entity = AsyncMock()
+        tracker._table = mock_table
+        
+        allowed, used, remaining, reservation = await tracker.check_and_reserve(test_fingerprint, limit=5)
+        
+        assert (allowed, used, remaining) == (True, 1, 4)
+        assert reservation == tracker._today_partition()
+        mock_table.create_entity.assert_called_once()
+    
+    @pytest.mark.asyncio
+    async def test_reserve_records_location_in_background(self, tracker, test_fingerprint):
+        """Test the reservation stores the IP and looks up its location afterwards."""
+        mock_table = AsyncMock()
+        mock_table.get_entity = AsyncMock(side_effect=ResourceNotFoundError())
+        tracker._table = mock_table
+        location = {"country": "United States", "city": "Seattle"}
+        
+        with patch("app.services.geolocation.get_location_from_ip", new_callable=AsyncMock, return_value=location):
+            allowed, *_ = await tracker.check_and_reserve(test_fingerprint, limit=5, ip_address="8.8.8.8")
+            created = mock_table.create_entity.call_args[0][0]
+            assert allowed is True
+            assert created["IPAddress"] == "8.8.8.8"
+            assert "Country" not in created
+            
+            await asyncio.gather(*tracker._location_tasks)
+        
+        merged = mock_table.update_entity.call_args[0][0]
+        assert (merged["Country"], merged["City"]) == ("United States", "Seattle")
+    
+    @pytest.mark.asyncio
+    async def test_reserve_blocks_when_exhausted(self, tracker, test_fingerprint):
+        """Test exhausted quota is rejected without writing."""
+        mock_table = AsyncMock()
+        mock_table.get_entity = AsyncMock(return_value=FakeEntity(RequestCount=5))
+        tracker._table = mock_table
+        
+        result = await tracker.check_and_reserve(test_fingerprint, limit=5)
+        
+        assert result == (False, 5, 0, None)
+        mock_table.update_entity.assert_not_called()
+    
+    @pytest.mark.asyncio
+    async def test_reserve_retries_on_etag_conflict(self, tracker, test_fingerprint):
+        """Test a concurrent update causes a re-read instead of a lost increment."""
+        mock_table = AsyncMock()
+        mock_table.get_entity = AsyncMock(side_effect=[
+            FakeEntity(RequestCount=2),
+            FakeEntity(RequestCount=3),
+        ])
+        mock_table.update_entity = AsyncMock(side_effect=[ResourceModifiedError(), None])
+        tracker._table = mock_table
+        
+        allowed, used, remaining, _ = await tracker.check_and_reserve(test_fingerprint, limit=5)
+        
+        assert (allowed, used, remaining) == (True, 4, 1)
+        assert mock_table.update_entity.call_count == 2
+    
+    @pytest.mark.asyncio
+    async def test_release_decrements_count(self, tracker, test_fingerprint):
+        """Test release gives back one request."""
+        mock_table = AsyncMock()
+        mock_table.get_entity = AsyncMock(return_value=FakeEntity(RequestCount=3))
+        tracker._table = mock_table
+        
+        await tracker.release(test_fingerprint, "2024-01-01")
+        
+        updated = mock_table.update_entity.call_args[0][0]
+        assert updated["RequestCount"] == 2
+
+
 @pytest.mark.unit
 class TestListAllUsage:
     """Tests for list_all_usage method."""
@@ -0,0 +1,145 @@
+"""
+Trial code database tests.
+
+Tests the SQLite layer against a temporary database file: write-behind usage
+counters, the legacy code_usage migration and the generated-code cache.
+"""
+
+import asyncio
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+import pytest
+
+from app import database
+
+
+@pytest.fixture
+async def db_path(tmp_path, monkeypatch):
+    """Point the database layer at a fresh file, with empty in-memory state."""
+    path = tmp_path / "trial_codes.db"
+    monkeypatch.setattr(database, "DB_PATH", path)
+    monkeypatch.setattr(database, "USAGE_FLUSH_INTERVAL", 3600.0)
+    monkeypatch.setattr(database, "_counts", {})
+    monkeypatch.setattr(database, "_pending", {})
+    monkeypatch.setattr(database, "_first_used", {})
+    monkeypatch.setattr(database, "_last_used", {})
+    monkeypatch.setattr(database, "_generated_code_cache", OrderedDict())
+    yield path
+    await database.close_db()
+
+
+def _stored_counts(path) -> dict[str, int]:
+    """Counts as persisted, read through a separate connection."""
+    with sqlite3.connect(path) as db:
+        return dict(db.execute("SELECT code, request_count FROM code_usage"))
+
+
+@pytest.mark.unit
+class TestUsageFlush:
+    """Tests for the write-behind usage counters."""
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_increments_flush_exact_totals(self, db_path):
+        """Test increments racing with flushes are each persisted exactly once."""
+        await database.init_db()
+        
+        async def bump(code: str, times: int) -> None:
+            for _ in range(times):
+                await database.increment_usage(code)
+                await asyncio.sleep(0)
+        
+        async def flush_repeatedly() -> None:
+            for _ in range(10):
+                await database.flush_usage()
+                await asyncio.sleep(0)
+        
+        await asyncio.gather(bump("CODE-A", 40), bump("CODE-B", 25), bump("CODE-A", 10), flush_repeatedly())
+        await database.flush_usage()
+        
+        assert _stored_counts(db_path) == {"CODE-A": 50, "CODE-B": 25}
+        assert await database.get_usage("CODE-A") == 50
+        assert not database._pending
+        assert not database._first_used and not database._last_used
+    
+    @pytest.mark.asyncio
+    async def test_flush_adds_to_counts_from_other_workers(self, db_path):
+        """Test a flush adds its delta instead of overwriting another process's writes."""
+        await database.init_db()
+        await database.increment_usage("CODE-A")
+        with sqlite3.connect(db_path) as other:
+            other.execute("INSERT INTO code_usage (code, request_count) VALUES ('CODE-A', 7)")
+        
+        await database.flush_usage()
+        
+        assert _stored_counts(db_path) == {"CODE-A": 8}
+        assert await database.get_usage("CODE-A") == 8
+
+
+@pytest.mark.unit
+class TestCodeUsageMigration:
+    """Tests for the legacy code_usage rebuild."""
+    
+    @pytest.mark.asyncio
+    async def test_iso_timestamps_become_epoch_seconds(self, db_path):
+        """Test a rowid table with ISO text timestamps is rebuilt with epoch integers."""
+        with sqlite3.connect(db_path) as legacy:
+            legacy.execute("""
+                CREATE TABLE code_usage (
+                    code TEXT PRIMARY KEY,
+                    request_count INTEGER DEFAULT 0,
+                    first_used_at TIMESTAMP,
+                    last_used_at TIMESTAMP
+                )
+            """)
+            legacy.execute(
+                "INSERT INTO code_usage VALUES ('CODE-A', 3, '2024-01-02T03:04:05', '2024-02-03 04:05:06')"
+            )
+        
+        await database.init_db()
+        
+        with sqlite3.connect(db_path) as db:
+            sql = db.execute("SELECT sql FROM sqlite_master WHERE name = 'code_usage'").fetchone()[0]
+            row = db.execute("SELECT request_count, first_used_at, last_used_at FROM code_usage").fetchone()
+        assert "WITHOUT ROWID" in sql.upper()
+        assert row == (
+            3,
+            int(datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc).timestamp()),
+            int(datetime(2024, 2, 3, 4, 5, 6, tzinfo=timezone.utc).timestamp()),
+        )
+        assert await database.get_usage("CODE-A") == 3
+    
+    def test_epoch_to_iso_is_utc(self):
+        """Test stored timestamps are listed as timezone-aware UTC ISO strings."""
+        assert database._epoch_to_iso(0) == "1970-01-01T00:00:00+00:00"
+        assert database._epoch_to_iso(None) is None
+
+
+@pytest.mark.unit
+class TestGeneratedCodeCache:
+    """Tests for the is_generated_code LRU."""
+    
+    @pytest.mark.asyncio
+    async def test_add_invalidates_cached_miss(self, db_path):
+        """Test a code looked up before it was generated is found afterwards."""
+        await database.init_db()
+        
+        assert await database.is_generated_code("NEW-CODE") is False
+        assert database._generated_code_cache["NEW-CODE"] is False
+        
+        await database.add_generated_code("NEW-CODE")
+        
+        assert "NEW-CODE" not in database._generated_code_cache
+        assert await database.is_generated_code("NEW-CODE") is True
+    
+    @pytest.mark.asyncio
+    async def test_cache_is_bounded(self, db_path, monkeypatch):
+        """Test the least recently used lookups are evicted past the cache size."""
+        monkeypatch.setattr(database, "GENERATED_CODE_CACHE_SIZE", 2)
+        await database.init_db()
+        
+        for code in ("CODE-1", "CODE-2", "CODE-1", "CODE-3"):
+            await database.is_generated_code(code)
+        
+        assert list(database._generated_code_cache) == ["CODE-1", "CODE-3"]
@@ -321,6 +321,23 @@ class TestWebSocketStreamingResponse:
         except ConnectionClosed:
             pass
     
+    def test_adjacent_text_chunks_are_merged(self):
+        """Test text runs in a batch are merged while other chunks keep their place."""
+        from app.main import merge_text_chunks
+        
+        chunks = [
+            {"type": "text", "content": "Hel"},
+            {"type": "text", "content": "lo"},
+            {"type": "clear_text", "chars": 5},
+            {"type": "text", "content": "!"},
+        ]
+        
+        assert merge_text_chunks(chunks) == [
+            {"type": "text", "content": "Hello"},
+            {"type": "clear_text", "chars": 5},
+            {"type": "text", "content": "!"},
+        ]
+    
     def test_websocket_response_includes_citations(self):
         """Test WebSocket response includes document citations."""
         client = TestClient(app)
@@ -558,5 +575,38 @@ class TestWebSocketCleanup:
             pass
 
 
+@pytest.mark.unit
+class TestWebSocketQuota:
+    """Tests for per-connection quota tracking."""
+    
+    def test_failed_last_quota_turn_allows_next_message(self, valid_jwt_token):
+        """Test a released last-of-day reservation doesn't block the next turn."""
+        tracker = MagicMock()
+        tracker.check_quota = AsyncMock(return_value=(True, 14, 1))
+        tracker.check_and_reserve = AsyncMock(return_value=(True, 15, 0, "20261016"))
+        tracker.release = AsyncMock()
+        
+        calls = []
+        
+        async def fake_conversation(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 1:
+                raise RuntimeError("LLM failed")
+            yield {"type": "text", "content": "Answer"}
+        
+        client = TestClient(app)
+        with patch("app.main.get_usage_tracker", return_value=tracker), \
+                patch("app.main.handle_conversation", side_effect=fake_conversation):
+            with client.websocket_connect(f"/ws/chat/conv-quota?token={valid_jwt_token}") as websocket:
+                websocket.send_json({"message": "First"})
+                assert websocket.receive_json()["type"] == "error"
+                
+                websocket.send_json({"message": "Second"})
+                assert websocket.receive_json() == {"type": "text", "content": "Answer"}
+        
+        tracker.release.assert_awaited_once_with("test-fingerprint-123", "20261016")
+        assert tracker.check_and_reserve.await_count == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,96 @@
+"""
+Middleware tests.
+
+Tests PreflightMiddleware in front of a CORSMiddleware configured like main.py.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.testclient import TestClient
+
+from app.middleware import PreflightMiddleware
+
+
+ORIGIN = "https://app.example.com"
+
+
+@pytest.fixture
+def client() -> TestClient:
+    """App with the same middleware stack as main.py and one route."""
+    app = FastAPI()
+    
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+    
+    @app.options("/ping")
+    async def ping_options():
+        return {"handled_by": "app"}
+    
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(PreflightMiddleware)
+    return TestClient(app)
+
+
+@pytest.mark.unit
+class TestPreflightMiddleware:
+    """Tests for PreflightMiddleware."""
+    
+    def test_preflight_is_answered(self, client):
+        """Test a preflight gets a 204 echoing the origin and requested headers, with credentials."""
+        response = client.options("/ping", headers={
+            "Origin": ORIGIN,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "authorization, content-type",
+        })
+        
+        assert response.status_code == 204
+        assert response.content == b""
+        assert response.headers["access-control-allow-origin"] == ORIGIN
+        assert response.headers["access-control-allow-headers"] == "authorization, content-type"
+        assert response.headers["access-control-allow-credentials"] == "true"
+        assert "POST" in response.headers["access-control-allow-methods"]
+        assert response.headers["vary"] == "Origin"
+    
+    def test_options_without_request_method_reaches_app(self, client):
+        """Test a plain OPTIONS request (not a preflight) falls through to the route."""
+        response = client.options("/ping", headers={"Origin": ORIGIN})
+        
+        assert response.status_code == 200
+        assert response.json() == {"handled_by": "app"}
+    
+    def test_regular_request_gets_cors_headers(self, client):
+        """Test non-OPTIONS requests still get CORSMiddleware's headers."""
+        # Credentialed request, so CORSMiddleware echoes the origin rather than "*"
+        response = client.get("/ping", headers={"Origin": ORIGIN, "Cookie": "session=1"})
+        
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert response.headers["access-control-allow-origin"] == ORIGIN
+        assert response.headers["access-control-allow-credentials"] == "true"
+    
+    @pytest.mark.asyncio
+    async def test_websocket_scope_passes_through(self):
+        """Test WebSocket scopes reach the wrapped app untouched."""
+        calls = []
+        
+        async def inner(scope, receive, send):
+            calls.append((scope, receive, send))
+        
+        async def receive():
+            return {"type": "websocket.connect"}
+        
+        async def send(message):
+            raise AssertionError("middleware must not respond to WebSocket scopes")
+        
+        scope = {"type": "websocket", "path": "/ws/chat/abc", "headers": [(b"origin", ORIGIN.encode())]}
+        await PreflightMiddleware(inner)(scope, receive, send)
+        
+        assert calls == [(scope, receive, send)]
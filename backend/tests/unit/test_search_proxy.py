@@ -0,0 +1,92 @@
+"""
+Search proxy tests.
+
+Tests gzip-encoded request bodies on the proxy's routes.
+"""
+
+import gzip
+import json
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from fastapi.testclient import TestClient
+
+from search_proxy.main import app
+
+
+@pytest.fixture
+def proxy_settings():
+    """Proxy settings with Azure Search configured."""
+    settings = MagicMock()
+    settings.azure_search_endpoint = "https://test-search.search.windows.net"
+    settings.azure_search_key = "test-search-key"
+    settings.valid_indexes = ["faa-agent", "nrc-agent", "dod-agent"]
+    settings.max_request_body_bytes = 1024 * 1024
+    with patch("search_proxy.main.get_settings", return_value=settings):
+        yield settings
+
+
+def _index_payload() -> dict:
+    """One-chunk /index request for a personal document."""
+    return {
+        "index": "faa-agent",
+        "fingerprint": "test-fingerprint-12345",
+        "documents": [{
+            "id": "doc-1-chunk-0",
+            "title": "Test",
+            "content": "Chunk text",
+            "source": "upload",
+            "doc_type": "personal",
+            "owner_fingerprint": "test-fingerprint-12345",
+            "uploaded_at": "2024-01-01T00:00:00Z",
+        }],
+    }
+
+
+@pytest.mark.unit
+class TestGzipRequests:
+    """Tests for gzip-encoded request bodies."""
+    
+    def test_gzip_index_request(self, proxy_settings):
+        """Test a gzip-encoded /index body is inflated and indexed."""
+        search_response = MagicMock()
+        search_response.raise_for_status = MagicMock()
+        search_response.json.return_value = {"value": [{"status": True, "statusCode": 201}]}
+        mock_client = AsyncMock()
+        mock_client.post.return_value = search_response
+        mock_client.__aenter__.return_value = mock_client
+        
+        client = TestClient(app)
+        with patch("search_proxy.main.httpx.AsyncClient", return_value=mock_client):
+            response = client.post(
+                "/index",
+                content=gzip.compress(json.dumps(_index_payload()).encode()),
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            )
+        
+        assert response.status_code == 200
+        assert response.json()["indexed_count"] == 1
+        uploaded = mock_client.post.call_args.kwargs["json"]["value"]
+        assert uploaded[0]["id"] == "doc-1-chunk-0"
+    
+    def test_malformed_gzip_is_rejected(self, proxy_settings):
+        """Test a body that isn't valid gzip gets a 400, not a 500."""
+        client = TestClient(app)
+        response = client.post(
+            "/index",
+            content=b"not gzip at all",
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == 400
+    
+    def test_oversized_gzip_is_rejected(self, proxy_settings):
+        """Test a body that inflates past the cap gets a 413 without being fully inflated."""
+        proxy_settings.max_request_body_bytes = 1024
+        client = TestClient(app)
+        response = client.post(
+            "/index",
+            content=gzip.compress(b" " * 1024 * 1024),
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        )
+        
+        assert response.status_code == 413
@@ -85,23 +85,57 @@ const getTypeColor = (type: string): string => {
   }
 };
 
+// Records requested per usage page
+const USAGE_PAGE_SIZE = 200;
+
+// Feedback is listed by recent window; "Load older" widens it step by step
+const FEEDBACK_WINDOWS = [7, 30, 90, 366];
+
+interface Page<T> {
+  records: T[];
+  nextCursor: string | null;
+}
+
+// Fetch one page of an admin listing
+const fetchPage = async <T,>(
+  path: string,
+  key: string,
+  token: string,
+  params: Record<string, string>,
+): Promise<Page<T>> => {
+  const response = await fetch(`${API_URL}${path}?${new URLSearchParams(params)}`, {
+    headers: { Authorization: `Bearer ${token}` },
+  });
+  if (!response.ok) throw new Error(`HTTP ${response.status}`);
+  const data = await response.json();
+  return { records: data[key] || [], nextCursor: data.next_cursor ?? null };
+};
+
+// Newest date first, then most recent request first
+const sortUsage = (records: UsageRecord[]) =>
+  records.sort((a, b) =>
+    b.date.localeCompare(a.date) || (b.last_request_at || '').localeCompare(a.last_request_at || ''));
+
 const AdminDashboard: Component<{ token: string }> = (props) => {
   const [activeTab, setActiveTab] = createSignal<TabType>('usage');
   const [usageData, setUsageData] = createSignal<UsageRecord[]>([]);
+  const [usageCursor, setUsageCursor] = createSignal<string | null>(null);
   const [feedbackData, setFeedbackData] = createSignal<FeedbackRecord[]>([]);
+  const [feedbackWindow, setFeedbackWindow] = createSignal(0);
   const [loading, setLoading] = createSignal(false);
   const [error, setError] = createSignal<string | null>(null);
 
-  const fetchUsage = async () => {
+  // Load one usage page: the first page, or the next one appended to what's shown
+  const fetchUsage = async (more = false) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await fetch(`${API_URL}/admin/usage`, {
-        headers: { Authorization: `Bearer ${props.token}` },
-      });
-      if (!response.ok) throw new Error(`HTTP ${response.status}`);
-      const data = await response.json();
-      setUsageData(data.usage || []);
+      const params: Record<string, string> = { limit: String(USAGE_PAGE_SIZE) };
+      const cursor = usageCursor();
+      if (more && cursor) params.cursor = cursor;
+      const page = await fetchPage<UsageRecord>('/admin/usage', 'usage', props.token, params);
+      setUsageData(sortUsage(more ? [...usageData(), ...page.records] : page.records));
+      setUsageCursor(page.nextCursor);
     } catch (e) {
       setError(`Failed to fetch usage: ${e}`);
     } finally {
@@ -109,16 +143,15 @@ const AdminDashboard: Component<{ token: string }> = (props) => {
     }
   };
 
-  const fetchFeedback = async () => {
+  // Load feedback from the last FEEDBACK_WINDOWS[windowIndex] days (newest first)
+  const fetchFeedback = async (windowIndex = feedbackWindow()) => {
     setLoading(true);
     setError(null);
     try {
-      const response = await fetch(`${API_URL}/admin/feedback`, {
-        headers: { Authorization: `Bearer ${props.token}` },
-      });
-      if (!response.ok) throw new Error(`HTTP ${response.status}`);
-      const data = await response.json();
-      setFeedbackData(data.feedback || []);
+      const days = String(FEEDBACK_WINDOWS[windowIndex]);
+      const page = await fetchPage<FeedbackRecord>('/admin/feedback', 'feedback', props.token, { days });
+      setFeedbackData(page.records);
+      setFeedbackWindow(windowIndex);
     } catch (e) {
       setError(`Failed to fetch feedback: ${e}`);
     } finally {
@@ -234,6 +267,11 @@ const AdminDashboard: Component<{ token: string }> = (props) => {
               </Show>
             </tbody>
           </table>
+          <Show when={usageCursor()}>
+            <button class="admin-load-more" onClick={() => fetchUsage(true)}>
+              Load more
+            </button>
+          </Show>
         </div>
       </Show>
 
@@ -275,7 +313,14 @@ const AdminDashboard: Component<{ token: string }> = (props) => {
             )}
           </For>
           <Show when={feedbackData().length === 0}>
-            <div class="feedback-empty">No feedback submitted yet</div>
+            <div class="feedback-empty">
+              No feedback in the last {FEEDBACK_WINDOWS[feedbackWindow()]} days
+            </div>
+          </Show>
+          <Show when={feedbackWindow() < FEEDBACK_WINDOWS.length - 1}>
+            <button class="admin-load-more" onClick={() => fetchFeedback(feedbackWindow() + 1)}>
+              Load older (last {FEEDBACK_WINDOWS[feedbackWindow() + 1]} days)
+            </button>
           </Show>
         </div>
       </Show>
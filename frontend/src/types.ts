@@ -64,6 +64,14 @@ export interface QuotaUpdateEvent {
   daily_limit: number;
 }
 
+/**
+ * Several streamed events coalesced into one frame by the backend
+ */
+export interface BatchEvent {
+  type: 'batch';
+  items: WebSocketEvent[];
+}
+
 export type WebSocketEvent =
   | TextEvent
   | ThinkingEvent
@@ -76,7 +84,8 @@ export type WebSocketEvent =
   | ClearTextEvent
   | DoneEvent
   | PingEvent
-  | QuotaUpdateEvent;
+  | QuotaUpdateEvent
+  | BatchEvent;
 
 /**
  * Application message types
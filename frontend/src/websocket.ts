@@ -62,19 +62,12 @@ export function createWebSocket(conversationId: string, token: string) {
       ws.onmessage = (event) => {
         try {
           const data = JSON.parse(event.data) as WebSocketEvent;
-          // Ignore ping messages (keep-alive)
-          if (data.type === 'ping') {
+          // Unpack coalesced stream events in order
+          if (data.type === 'batch') {
+            data.items.forEach(dispatch);
             return;
           }
-          // Handle quota updates specially
-          if (data.type === 'quota_update') {
-            const quotaData = data as QuotaUpdateEvent;
-            logger.info('ws', 'Quota update', { used: quotaData.requests_used, remaining: quotaData.requests_remaining });
-            quotaUpdateHandler?.(quotaData.requests_used, quotaData.requests_remaining);
-            return;
-          }
-          logger.info('ws', `Message: ${data.type}`, data.type === 'text' ? { preview: data.content.slice(0, 100) } : undefined);
-          eventHandler?.(data);
+          dispatch(data);
         } catch (error) {
           logger.error('ws', 'Failed to parse WebSocket message', { error, raw: event.data.slice(0, 200) });
         }
@@ -115,6 +108,22 @@ export function createWebSocket(conversationId: string, token: string) {
     }
   }
 
+  function dispatch(data: WebSocketEvent) {
+    // Ignore ping messages (keep-alive)
+    if (data.type === 'ping') {
+      return;
+    }
+    // Handle quota updates specially
+    if (data.type === 'quota_update') {
+      const quotaData = data as QuotaUpdateEvent;
+      logger.info('ws', 'Quota update', { used: quotaData.requests_used, remaining: quotaData.requests_remaining });
+      quotaUpdateHandler?.(quotaData.requests_used, quotaData.requests_remaining);
+      return;
+    }
+    logger.info('ws', `Message: ${data.type}`, data.type === 'text' ? { preview: data.content.slice(0, 100) } : undefined);
+    eventHandler?.(data);
+  }
+
   function scheduleReconnect() {
     if (reconnectTimer) {
       clearTimeout(reconnectTimer);